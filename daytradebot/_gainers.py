@@ -0,0 +1,277 @@
+# daytradebot/_gainers.py
+"""
+Shared StockAnalysis top-gainers scraper used by top_gainers_bot.py,
+gainers_cog.py and topdailytrade.py.
+
+  fetch_gainers_df / fetch_gainers_rows    -> blocking (requests.Session); run via asyncio.to_thread
+  afetch_gainers_df / afetch_gainers_rows  -> native async (shared aiohttp.ClientSession)
+
+Both transports feed one TTL cache of the parsed table; once it expires the
+page is re-requested conditionally (ETag / Last-Modified) and a 304 keeps it.
+Compression is left to the clients' default Accept-Encoding (gzip, deflate).
+
+  human_price / human_num / mcap_text / hours_by_minute -> embed formatting + post schedule
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+
+import aiohttp
+import lxml.html
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+
+GAINERS_URL = "https://stockanalysis.com/markets/gainers/"
+
+HEADERS = {
+    # A polite UA helps avoid being blocked by some servers:
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+# The site headers typically look like:
+# ['No.', 'Symbol', 'Company Name', '% Change', 'Stock Price', 'Volume', 'Market Cap']
+COL_MAP = {
+    "Company Name": "Company",
+    "Stock Price": "Price",
+    "% Change": "% Change",
+    "Symbol": "Symbol",
+    "Volume": "Volume",
+    "Market Cap": "Market Cap",
+    "No.": "No.",
+}
+KEEP_COLS = ["No.", "Symbol", "Company", "% Change", "Price", "Volume", "Market Cap"]
+NUMERIC_COLS = ("% Change", "Price", "Volume")
+
+# Short-lived cache so a scheduled post + a manual "top" right after share one download
+CACHE_TTL_SEC = 60
+_CACHE = {"ts": 0.0, "table": None, "etag": None, "last_mod": None}
+
+
+# --------- parsing ---------
+# The target is the page's first <table>; slicing it out first means lxml parses a
+# few KB instead of the whole page (nav, scripts, footer).
+_TABLE_RE = re.compile(r"<table\b.*?</table>", re.DOTALL | re.IGNORECASE)
+
+
+def _first_table(html: str):
+    m = _TABLE_RE.search(html)
+    if m:
+        try:
+            return lxml.html.fragment_fromstring(m.group(0))
+        except Exception:
+            pass  # odd markup inside the slice -> parse the full page below
+    tables = lxml.html.fromstring(html).xpath("//table")
+    if not tables:
+        raise RuntimeError("No tables found on the page.")
+    return tables[0]
+
+
+def parse_gainers_table(html: str):
+    """
+    Parse the first <table> on the page straight from lxml.
+    Returns (header, body): normalized column names + list of raw cell-text rows.
+    """
+    trs = _first_table(html).xpath(".//tr")
+    if not trs:
+        raise RuntimeError("Gainers table is empty.")
+
+    header = [COL_MAP.get(h, h) for h in (c.text_content().strip() for c in trs[0].xpath("./th|./td"))]
+    body = []
+    for tr in trs[1:]:
+        cells = [td.text_content().strip() for td in tr.xpath("./td")]
+        if len(cells) == len(header):
+            body.append(cells)
+    return header, body
+
+
+_NUM_JUNK_RE = re.compile(r"[%$,]")
+_NAN = float("nan")
+
+
+def _cell_to_float(text, default=None):
+    try:
+        return float(_NUM_JUNK_RE.sub("", text))
+    except (TypeError, ValueError):
+        return default
+
+
+def table_to_df(table, limit: int | None = 20) -> pd.DataFrame:
+    """
+    Known schema -> typed tuples -> DataFrame.from_records: numerics are coerced once
+    while building each record, so there is no rename/select/str.replace pass afterwards.
+    Market Cap stays a string like '1.23B'.
+    """
+    header, body = table
+    cols = [c for c in KEEP_COLS if c in header]
+    plan = [(header.index(c), c in NUMERIC_COLS) for c in cols]
+    records = [
+        tuple(_cell_to_float(cells[i], _NAN) if numeric else cells[i] for i, numeric in plan)
+        for cells in (body if limit is None else body[:limit])
+    ]
+    return pd.DataFrame.from_records(records, columns=cols)
+
+
+def table_to_rows(table, limit: int | None = 20) -> list[dict]:
+    """Plain dicts with the same keys/types as the DataFrame columns (no pandas)."""
+    header, body = table
+    idx = {name: i for i, name in enumerate(header)}
+
+    def cell(cells, name):
+        i = idx.get(name)
+        return None if i is None else cells[i]
+
+    rows = []
+    for cells in (body if limit is None else body[:limit]):
+        rows.append({
+            "Symbol": cell(cells, "Symbol") or "-",
+            "Company": cell(cells, "Company") or "-",
+            "% Change": _cell_to_float(cell(cells, "% Change")),
+            "Price": _cell_to_float(cell(cells, "Price")),
+            "Volume": _cell_to_float(cell(cells, "Volume")),
+            "Market Cap": cell(cells, "Market Cap"),
+        })
+    return rows
+
+
+def _cached_table():
+    if _CACHE["table"] is not None and time.monotonic() - _CACHE["ts"] < CACHE_TTL_SEC:
+        return _CACHE["table"]
+    return None
+
+
+def _store_table(table):
+    _CACHE["table"] = table
+    _CACHE["ts"] = time.monotonic()
+    return table
+
+
+def _conditional_headers() -> dict:
+    """If-None-Match / If-Modified-Since for the table we already hold (304 -> reuse it)."""
+    if _CACHE["table"] is None:
+        return {}
+    h = {}
+    if _CACHE["etag"]:
+        h["If-None-Match"] = _CACHE["etag"]
+    if _CACHE["last_mod"]:
+        h["If-Modified-Since"] = _CACHE["last_mod"]
+    return h
+
+
+def _remember_validators(headers) -> None:
+    _CACHE["etag"] = headers.get("ETag")
+    _CACHE["last_mod"] = headers.get("Last-Modified")
+
+
+# --------- formatting / scheduling ---------
+def human_price(x):
+    return "-" if pd.isna(x) else f"${x:,.2f}"
+
+_UNITS = (("B", 1_000_000_000), ("M", 1_000_000), ("K", 1_000))
+
+def human_num(n):
+    if pd.isna(n):
+        return "-"
+    n = float(n)
+    for unit, div in _UNITS:
+        if abs(n) >= div:
+            return f"{n/div:.2f}{unit}"
+    return f"{n:,.0f}"
+
+_MCAP_SUFFIXES = ("B", "M", "K")
+
+def mcap_text(mcap):
+    # site already formats market cap ('1.23B'); one C-level endswith instead of any(...)
+    return mcap if isinstance(mcap, str) and mcap.endswith(_MCAP_SUFFIXES) else human_num(mcap)
+
+
+def hours_by_minute(times):
+    """["15:00", "17:00", "15:30"] -> {0: "15,17", 30: "15"}: one CronTrigger per distinct minute."""
+    grouped = {}
+    for t in times:
+        hh, mm = t.split(":")
+        grouped.setdefault(int(mm), set()).add(int(hh))
+    return {mm: ",".join(map(str, sorted(hours))) for mm, hours in grouped.items()}
+
+
+# --------- blocking transport ---------
+# Reuse one pooled connection (TCP + TLS) across calls instead of a fresh handshake each time
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_SYNC_LOCK = threading.Lock()  # callers run in worker threads (asyncio.to_thread)
+
+
+def fetch_gainers_table():
+    with _SYNC_LOCK:
+        table = _cached_table()
+        if table is None:
+            r = _SESSION.get(GAINERS_URL, headers=_conditional_headers(), timeout=30)
+            if r.status_code == 304:
+                return _store_table(_CACHE["table"])
+            r.raise_for_status()
+            table = _store_table(parse_gainers_table(r.text))
+            _remember_validators(r.headers)
+        return table
+
+
+def fetch_gainers_df(limit: int | None = 20) -> pd.DataFrame:
+    """
+    Fetch today's top stock gainers from StockAnalysis and return a tidy DataFrame.
+    Columns: No., Symbol, Company, % Change, Price, Volume, Market Cap (if present).
+    """
+    return table_to_df(fetch_gainers_table(), limit)
+
+
+def fetch_gainers_rows(limit: int | None = 20) -> list[dict]:
+    return table_to_rows(fetch_gainers_table(), limit)
+
+
+# --------- async transport ---------
+_http: aiohttp.ClientSession | None = None
+_async_lock = asyncio.Lock()
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(headers=HEADERS, timeout=aiohttp.ClientTimeout(total=30))
+    return _http
+
+
+async def close_http_session() -> None:
+    global _http
+    if _http is not None and not _http.closed:
+        await _http.close()
+    _http = None
+
+
+async def afetch_gainers_table():
+    """Cached (header, body); concurrent callers share one in-flight fetch."""
+    async with _async_lock:
+        table = _cached_table()
+        if table is None:
+            async with get_http_session().get(GAINERS_URL, headers=_conditional_headers()) as r:
+                if r.status == 304:
+                    return _store_table(_CACHE["table"])
+                r.raise_for_status()
+                html = await r.text()
+                headers = r.headers
+            table = _store_table(parse_gainers_table(html))
+            _remember_validators(headers)
+        return table
+
+
+async def afetch_gainers_df(limit: int | None = 20) -> pd.DataFrame:
+    return table_to_df(await afetch_gainers_table(), limit)
+
+
+async def afetch_gainers_rows(limit: int | None = 20) -> list[dict]:
+    return table_to_rows(await afetch_gainers_table(), limit)
@@ -2,11 +2,11 @@
 from __future__ import annotations
 
 import os
+import asyncio
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from typing import List
 
-import requests
 import pandas as pd
 import discord
 from discord.ext import commands
@@ -15,94 +15,41 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from discord import app_commands
 
+from daytradebot._gainers import (
+    GAINERS_URL,
+    fetch_gainers_df as get_top_gainers,
+    human_price,
+    human_num,
+    mcap_text,
+    hours_by_minute,
+)
+
 
-GAINERS_URL = "https://stockanalysis.com/markets/gainers/"
 TZ = ZoneInfo(os.getenv("MARKET_TZ", "Asia/Jerusalem"))
 
 # Where to post (falls back to LISTEN_CHANNEL_ID if not set)
 CHANNEL_ID = int("1411064822635696188") 
 
 
-# --------- scraping ---------
-def get_top_gainers(limit: int = 20) -> pd.DataFrame:
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-    }
-    r = requests.get(GAINERS_URL, headers=headers, timeout=30)
-    r.raise_for_status()
-
-    df_raw = None
-    for flavor in (None, "lxml", "html5lib"):
-        try:
-            tables = pd.read_html(r.text, flavor=None if flavor is None else flavor)
-            if tables:
-                df_raw = tables[0].copy()
-                break
-        except Exception:
-            continue
-    if df_raw is None:
-        raise RuntimeError("Could not parse gainers table. Install lxml or html5lib.")
-
-    col_map = {
-        "Company Name": "Company",
-        "Stock Price": "Price",
-        "% Change": "% Change",
-        "Symbol": "Symbol",
-        "Volume": "Volume",
-        "Market Cap": "Market Cap",
-        "No.": "No.",
-    }
-    df = df_raw.rename(columns=col_map)
-    keep = [c for c in ["No.", "Symbol", "Company", "% Change", "Price", "Volume", "Market Cap"] if c in df]
-    df = df[keep].copy()
-
-    to_num = lambda s: pd.to_numeric(s.astype(str).str.replace(",", "", regex=False), errors="coerce")
-    if "% Change" in df:
-        df["% Change"] = pd.to_numeric(df["% Change"].astype(str).str.replace("%", "", regex=False), errors="coerce")
-    if "Price" in df:
-        df["Price"] = pd.to_numeric(
-            df["Price"].astype(str).str.replace("$", "", regex=False).str.replace(",", "", regex=False),
-            errors="coerce",
-        )
-    if "Volume" in df:
-        df["Volume"] = to_num(df["Volume"])
-
-    return df.head(limit).reset_index(drop=True)
-
-
 # --------- formatting ---------
-def _human_price(x):
-    return "-" if pd.isna(x) else f"${x:,.2f}"
-
-def _human_num(n):
-    if pd.isna(n):
-        return "-"
-    n = float(n)
-    for unit, div in [("B", 1_000_000_000), ("M", 1_000_000), ("K", 1_000)]:
-        if abs(n) >= div:
-            return f"{n/div:.2f}{unit}"
-    return f"{n:,.0f}"
-
 def build_embed_fields(df: pd.DataFrame, max_rows: int = 12):
     fields = []
-    for _, row in df.head(max_rows).iterrows():
-        sym = str(row.get("Symbol", "-"))
-        comp = str(row.get("Company", "-"))
-        chg = row.get("% Change", None)
-        price = row.get("Price", None)
-        vol = row.get("Volume", None)
-        mcap = row.get("Market Cap", None)
+    df = df.head(max_rows)
+
+    def col(name, default=None):
+        return df[name].to_numpy() if name in df else [default] * len(df)
+
+    for sym, comp, chg, price, vol, mcap in zip(
+        col("Symbol", "-"), col("Company", "-"), col("% Change"),
+        col("Price"), col("Volume"), col("Market Cap"),
+    ):
+        sym = str(sym)
+        comp = str(comp)
 
         chg_str = "-" if pd.isna(chg) else f"+{chg:.2f}%"
-        price_str = _human_price(price)
-        vol_str = _human_num(vol)
-        if isinstance(mcap, str) and any(s in mcap for s in ["B", "M", "K"]):
-            mcap_str = mcap
-        else:
-            mcap_str = _human_num(mcap)
+        price_str = human_price(price)
+        vol_str = human_num(vol)
+        mcap_str = mcap_text(mcap)
 
         name = f"**{sym}**  `⬆ {chg_str}`   •  `{price_str}`"
         value = f"{comp}\nVol {vol_str} • Mcap {mcap_str}"
@@ -110,6 +57,7 @@ def build_embed_fields(df: pd.DataFrame, max_rows: int = 12):
     return fields
 
 
+
 class GainersCog(commands.Cog):
     """
     Posts Top Gainers on a schedule, responds to 'top' messages, and exposes /top.
@@ -134,12 +82,11 @@ class GainersCog(commands.Cog):
         except Exception:
             pass
 
-        for t in self.times:
-            hh, mm = t.split(":")
+        for mm, hours in hours_by_minute(self.times).items():
             self.scheduler.add_job(
                 self._post_top_gainers,
-                CronTrigger(hour=int(hh), minute=int(mm), day_of_week="mon-fri", timezone=TZ),
-                id=f"gainers-{hh}{mm}",
+                CronTrigger(hour=hours, minute=mm, day_of_week="mon-fri", timezone=TZ),
+                id=f"gainers-m{mm:02d}",
                 replace_existing=True,
                 misfire_grace_time=300,
             )
@@ -166,7 +113,8 @@ class GainersCog(commands.Cog):
             await ch.send("⛔ Market is closed (weekend). Top Gainers run only Mon–Fri.")
             return
         try:
-            df = get_top_gainers(limit=max(rows, 12))
+            # scrape + parse is blocking; keep it off the event loop
+            df = await asyncio.to_thread(get_top_gainers, max(rows, 12))
             fields = build_embed_fields(df, max_rows=rows)
 
             now = datetime.now(TZ)
@@ -7,7 +7,8 @@ if platform.system() == "Darwin":
 import os, sys; sys.path.append(".")
 # -------------------------------------------------------------------
 
-import json, time, logging
+import asyncio, logging
+from functools import lru_cache
 from datetime import datetime
 from typing import Dict, Optional, Tuple, List
 
@@ -15,9 +16,13 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
-import yfinance as yf
-from dateutil import tz
+# yfinance (pandas/numpy) and dateutil are imported on first use; see _yfinance() / build_embed
+yf = None
+
+from portfolio.storage import load_data, save_data, append_closed
+from portfolio.prices import cached_price, remember_price, invalidate_price, get_yf_session
 
 # ----------------- Config -----------------
 try:
@@ -31,9 +36,8 @@ if not TOKEN:
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))                # your Discord user ID
 DEFAULT_TZ = os.getenv("DEFAULT_TZ", "Asia/Jerusalem")
 TEST_CHANNEL_ID = int("1425525386665529374")
-DATA_FILE = os.getenv("PORTFOLIO_DB", "portfolio/portfolio.json")
 REFRESH_COOLDOWN_SECONDS = 30
-CLOSED_MAX = 500
+PRICE_TTL = 25  # seconds a fetched price is reused across renders/commands
 
 # ------------- Intents / Bot -------------
 intents = discord.Intents.none()
@@ -41,36 +45,47 @@ intents.guilds = True
 bot = commands.Bot(command_prefix="!", intents=intents)
 
 # ------------- Persistence ---------------
-def _ensure_db_dir() -> None:
-    d = os.path.dirname(DATA_FILE) or "."
-    os.makedirs(d, exist_ok=True)
-
-def load_data() -> Dict:
-    _ensure_db_dir()
-    base = {"channel_id": None, "message_id": None, "positions": {}, "closed": []}
-    if not os.path.exists(DATA_FILE):
-        return base
+state = load_data()
+
+SAVE_DEBOUNCE_SECONDS = 1.0
+_save_task: Optional[asyncio.Task] = None
+
+def request_save() -> None:
+    """Coalesce bursts of mutations into one save_data(state) at most every SAVE_DEBOUNCE_SECONDS."""
+    global _save_task
+    if _save_task is None or _save_task.done():
+        _save_task = asyncio.get_running_loop().create_task(_save_later())
+
+async def _save_later() -> None:
+    await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        data.setdefault("closed", [])
-        return data
+        save_data(state)
     except Exception:
-        return base
+        logging.exception("Saving portfolio state failed.")
 
-def save_data(data: Dict) -> None:
-    _ensure_db_dir()
-    tmp = DATA_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, DATA_FILE)
+# ------------- Prices / Math -------------
+_daily_fallback_tried: set = set()   # tickers that already went through the 5d yf.download fallback
 
-state = load_data()
+def _yfinance():
+    """Import yfinance on the first price lookup so an idle bot doesn't pay for pandas."""
+    global yf
+    if yf is None:
+        import yfinance
+        yf = yfinance
+    return yf
 
-# ------------- Prices / Math -------------
 async def fetch_last_price(ticker: str) -> Optional[float]:
+    cached = cached_price(ticker, PRICE_TTL)
+    if cached is not None:
+        return cached
+    # yfinance is blocking; keep it off the event loop
+    return remember_price(ticker, await asyncio.to_thread(_fetch_last_price_uncached, ticker))
+
+def _fetch_last_price_uncached(ticker: str) -> Optional[float]:
     try:
-        t = yf.Ticker(ticker)
+        # a fresh Ticker per lookup: yfinance memoizes fast_info on the instance, so a kept one
+        # would return its first quote forever; the shared session is what's worth reusing
+        t = _yfinance().Ticker(ticker, session=get_yf_session())
         try:
             fi = getattr(t, "fast_info", None)
             if fi:
@@ -85,13 +100,68 @@ async def fetch_last_price(ticker: str) -> Optional[float]:
                 return float(df["Close"].iloc[-1])
         except Exception:
             pass
-        df = yf.download(ticker, period="5d", interval="1d", progress=False)
+        # slow daily-bar download: only worth one try per ticker (usually delisted/typo when we get here)
+        if ticker in _daily_fallback_tried:
+            return None
+        _daily_fallback_tried.add(ticker)
+        df = _yfinance().download(ticker, period="5d", interval="1d", progress=False, session=get_yf_session())
         if df is not None and len(df) > 0:
             return float(df["Close"].iloc[-1])
         return None
     except Exception:
         return None
 
+def _close_column(df, ticker: str):
+    # group_by="ticker" gives (ticker, field) columns; older yfinance returns flat columns for one symbol
+    if getattr(df.columns, "nlevels", 1) > 1:
+        if ticker not in df.columns.get_level_values(0):
+            return None
+        return df[ticker]["Close"]
+    return df["Close"]
+
+async def fetch_last_prices(tickers: List[str]) -> Dict[str, Optional[float]]:
+    """Last price for every ticker with one bulk yf.download; misses fall back to fetch_last_price."""
+    prices: Dict[str, Optional[float]] = {}
+    stale = []
+    for tkr in tickers:
+        cached = cached_price(tkr, PRICE_TTL)
+        if cached is None:
+            stale.append(tkr)
+        else:
+            prices[tkr] = cached
+    if not stale:
+        return prices
+    try:
+        # the yfinance import and the first session build both happen on the worker thread
+        df = await asyncio.to_thread(lambda: _yfinance().download(
+            tickers=" ".join(stale), period="1d", interval="1m",
+            group_by="ticker", threads=True, progress=False, session=get_yf_session(),
+        ))
+    except Exception:
+        df = None
+    misses = []
+    for tkr in stale:
+        last = None
+        if df is not None and len(df) > 0:
+            try:
+                closes = _close_column(df, tkr)
+                if closes is not None:
+                    closes = closes.dropna()
+                    if len(closes) > 0:
+                        last = float(closes.iloc[-1])
+            except Exception:
+                last = None
+        if last is None:
+            misses.append(tkr)
+        else:
+            prices[tkr] = remember_price(tkr, last)
+
+    # symbols the bulk call had no bars for: per-ticker lookups, all in flight at once
+    if misses:
+        results = await asyncio.gather(*(fetch_last_price(t) for t in misses))
+        prices.update(zip(misses, results))
+    return prices
+
 def pct(entry: float, last: float) -> float:
     if entry is None or last is None or entry == 0:
         return 0.0
@@ -107,6 +177,11 @@ def distance_from_stop(last: float, stop: float) -> Optional[float]:
         return (last / stop - 1.0) * 100.0
     return None
 
+@lru_cache(maxsize=1024)
+def _fmt_levels(entry: float, stop: float, target: float) -> Tuple[str, str, str]:
+    # entry/stop/target only change on /pnl set, so each triple is formatted once
+    return f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}"
+
 def fmt_pct(x: Optional[float]) -> str:
     if x is None:
         return "—"
@@ -114,17 +189,14 @@ def fmt_pct(x: Optional[float]) -> str:
     return f"{emoji}{x:+.2f}%"
 
 def monospaced_table(rows: List[List[str]]) -> str:
-    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
-    lines = []
-    for ridx, r in enumerate(rows):
-        parts = []
+    # single pass for column widths, then C-level ljust for padding
+    widths = [0] * len(rows[0])
+    for r in rows:
         for i, cell in enumerate(r):
-            pad = " " * (widths[i] - len(cell))
-            parts.append(cell + pad)
-        line = "  ".join(parts)
-        lines.append(line)
-        if ridx == 0:
-            lines.append("-" * len(line))
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+    lines = ["  ".join(cell.ljust(w) for cell, w in zip(r, widths)) for r in rows]
+    lines.insert(1, "-" * len(lines[0]))
     return "```\n" + "\n".join(lines) + "\n```"
 
 def green_embed(title: str) -> discord.Embed:
@@ -137,27 +209,35 @@ def red_embed(title: str) -> discord.Embed:
 def _now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
-def _append_closed(data: Dict, rec: Dict) -> None:
-    data.setdefault("closed", []).append(rec)
-    if len(data["closed"]) > CLOSED_MAX:
-        data["closed"] = data["closed"][-CLOSED_MAX:]
+def _closed_row(rec: Dict) -> List[str]:
+    """Closed trades never change, so each record's table row is formatted once and kept on it (in memory only)."""
+    row = rec.get("_row")
+    if row is None:
+        pnlv = float(rec.get("pnl_pct", pct(float(rec["entry"]), float(rec["exit"]))))
+        row = rec["_row"] = [
+            rec["ticker"], f"{float(rec['entry']):.2f}", f"{float(rec['stop']):.2f}",
+            f"{float(rec['target']):.2f}", f"{float(rec['exit']):.2f}",
+            fmt_pct(pnlv), rec.get("reason", "manual"), (rec.get("closed_at") or "")[:10],
+        ]
+    return row
 
 # ------------- Refresh View --------------
 class RefreshView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
-        self._last_click = 0.0
+        # per-user bucket: one user's refresh doesn't lock the button for everyone
+        self._cd = commands.CooldownMapping(
+            commands.Cooldown(1, REFRESH_COOLDOWN_SECONDS), lambda i: i.user.id
+        )
 
     @discord.ui.button(label="Refresh now", style=discord.ButtonStyle.primary,
                        custom_id="pnl_refresh_now", emoji="🔄")
     async def refresh_now(self, interaction: discord.Interaction, button: discord.ui.Button):
-        now = time.monotonic()
-        if now - self._last_click < REFRESH_COOLDOWN_SECONDS:
-            wait_s = int(REFRESH_COOLDOWN_SECONDS - (now - self._last_click))
+        retry = self._cd.get_bucket(interaction).update_rate_limit()
+        if retry:
             return await interaction.response.send_message(
-                f"Please wait {wait_s}s before refreshing again.", ephemeral=True
+                f"Please wait {retry:.0f}s before refreshing again.", ephemeral=True
             )
-        self._last_click = now
         await interaction.response.defer(ephemeral=True)
         try:
             await render_and_publish()
@@ -171,25 +251,27 @@ _persistent_view: Optional[RefreshView] = None
 # ------------- Rendering -----------------
 async def render_content_and_maybe_autoclose() -> Tuple[str, float, float]:
     positions = state.get("positions", {}) or {}
-    closed = state.get("closed", []) or []
 
-    perfs_open: List[float] = []
     rows_open = [["Ticker", "Entry", "Stop", "Target", "Price", "%PnL", "% to Stop", "% to Target", "Status"]]
+    perfs_open: List[float] = []
     to_close: List[Tuple[str, float, str]] = []
 
-    for tkr, p in sorted(positions.items()):
+    # one bulk request for every open ticker; single pass, no re-fetch after auto-close
+    prices = await fetch_last_prices(list(positions))
+
+    for tkr, p in positions.items():  # kept in ticker order by pnl_add / load_data
         entry = float(p["entry"])
         stop = float(p["stop"])
         target = float(p["target"])
 
-        last = await fetch_last_price(tkr)
+        levels = _fmt_levels(entry, stop, target)
+
+        last = prices.get(tkr)
         if last is None:
-            rows_open.append([tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", "—", "—", "—", "—", "—"])
+            rows_open.append([tkr, *levels, "—", "—", "—", "—", "—"])
             continue
 
         pnl = pct(entry, last)
-        perfs_open.append(pnl)
-
         to_stop = distance_from_stop(last, stop)
         to_tgt = remaining_to_target(last, target)
 
@@ -200,14 +282,17 @@ async def render_content_and_maybe_autoclose() -> Tuple[str, float, float]:
         elif last >= target:
             status = "🎯 target hit"; reason = "target"
 
+        if reason is not None:
+            # moves to Closed Trades below; keep it out of the open table/average
+            to_close.append((tkr, last, reason))
+            continue
+
+        perfs_open.append(pnl)
         rows_open.append([
-            tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", f"{last:.2f}",
+            tkr, *levels, f"{last:.2f}",
             fmt_pct(pnl), fmt_pct(to_stop), fmt_pct(to_tgt), status
         ])
 
-        if reason is not None:
-            to_close.append((tkr, last, reason))
-
     if to_close:
         for tkr, exit_price, reason in to_close:
             pos = state["positions"].pop(tkr, None)
@@ -219,65 +304,29 @@ async def render_content_and_maybe_autoclose() -> Tuple[str, float, float]:
                 "created_at": pos.get("created_at"), "closed_at": _now_iso(),
                 "pnl_pct": pct(float(pos["entry"]), float(exit_price)),
             }
-            _append_closed(state, rec)
-        save_data(state)
-
-        # re-render skeleton of open table (prices will refresh next tick)
-        positions = state.get("positions", {})
-        perfs_open = []
-        rows_open = [["Ticker", "Entry", "Stop", "Target", "Price", "%PnL", "% to Stop", "% to Target", "Status"]]
-        if positions:
-            for tkr, p in sorted(positions.items()):
-                entry = float(p["entry"]); stop = float(p["stop"]); target = float(p["target"])
-                rows_open.append([tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", "—", "—", "—", "—", "—"])
+            append_closed(state, rec)
+        request_save()
 
-    able_open  = monospaced_table(rows_open)  if len(rows_open)  > 1 else "No open positions."
-    
+    table_open = monospaced_table(rows_open) if len(rows_open) > 1 else "No open positions."
 
+    closed = state.get("closed", []) or []
     rows_closed = [["Ticker", "Entry", "Stop", "Target", "Exit", "%PnL", "Reason", "Closed At"]]
-    perfs_closed: List[float] = []
-    for rec in reversed(closed):
-        pnlv = float(rec.get("pnl_pct", pct(float(rec["entry"]), float(rec["exit"]))))
-        perfs_closed.append(pnlv)
-        rows_closed.append([
-            rec["ticker"], f"{float(rec['entry']):.2f}", f"{float(rec['stop']):.2f}",
-            f"{float(rec['target']):.2f}", f"{float(rec['exit']):.2f}",
-            fmt_pct(pnlv), rec.get("reason", "manual"), (rec.get("closed_at") or "")[:10],
-        ])
+    rows_closed.extend(_closed_row(rec) for rec in closed)  # already newest first
     table_closed = monospaced_table(rows_closed) if len(rows_closed) > 1 else "No closed trades yet."
 
     open_pct = (sum(perfs_open) / max(1, len(perfs_open))) if perfs_open else 0.0
-    realized_pct = (sum(perfs_closed) / max(1, len(perfs_closed))) if perfs_closed else 0.0
-    positions = state.get("positions", {}) or {}
-    final_rows_open = [["Ticker", "Entry", "Stop", "Target", "Price", "%PnL", "% to Stop", "% to Target", "Status"]]
-    perfs_open_final: List[float] = []
-
-    for tkr, p in sorted(positions.items()):
-        entry = float(p["entry"]); stop = float(p["stop"]); target = float(p["target"])
-        last = await fetch_last_price(tkr)
-        if last is None:
-            final_rows_open.append([tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", "—","—","—","—","—"])
-            continue
-        pnl = pct(entry, last); perfs_open_final.append(pnl)
-        to_stop = distance_from_stop(last, stop); to_tgt = remaining_to_target(last, target)
-        status = "🟢" if last >= entry else "🔴"
-        final_rows_open.append([
-            tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", f"{last:.2f}",
-            fmt_pct(pnl), fmt_pct(to_stop), fmt_pct(to_tgt), status
-        ])
-
-    table_open = monospaced_table(final_rows_open) if len(final_rows_open) > 1 else "No open positions."
-    # rows_closed/perfs_closed already built above
-    open_pct = (sum(perfs_open_final) / max(1, len(perfs_open_final))) if perfs_open_final else 0.0
-    realized_pct = (sum(perfs_closed) / max(1, len(perfs_closed))) if perfs_closed else 0.0
+    # running sum/count kept by append_closed; no pass over the closed list
+    closed_count = state.get("closed_count", 0)
+    realized_pct = (state.get("closed_sum", 0.0) / closed_count) if closed_count else 0.0
     content = (
-        "**Open Positions**\n" + (table_open if isinstance(table_open, str) else "") + "\n"
-        "**Closed Trades**\n" + (table_closed if isinstance(table_closed, str) else "") + "\n"
+        "**Open Positions**\n" + table_open + "\n"
+        "**Closed Trades**\n" + table_closed + "\n"
         "_(Equal-weight averages; amounts intentionally omitted)_"
     )
     return content, open_pct, realized_pct
 
 def build_embed(open_pct: float, realized_pct: float) -> discord.Embed:
+    from dateutil import tz
     tzinfo = tz.gettz(DEFAULT_TZ)
     now_str = datetime.now(tzinfo).strftime("%Y-%m-%d %H:%M")
     emoji_open = "🟢" if open_pct >= 0 else "🔴"
@@ -285,23 +334,44 @@ def build_embed(open_pct: float, realized_pct: float) -> discord.Embed:
     title = f"{now_str} • Open PnL: {emoji_open}{open_pct:+.2f}% • Realized: {emoji_real}{realized_pct:+.2f}%"
     return green_embed(title) if open_pct >= 0 else red_embed(title)
 
+# the pinned message, kept after the first fetch/send so ticks don't re-fetch it over HTTP
+_cached_msg: Optional[discord.Message] = None
+
+# resolved once (on_ready / setchannel) instead of get_channel + isinstance every tick
+_channel: Optional[discord.TextChannel] = None
+
+def _set_channel(ch: Optional[discord.TextChannel]) -> None:
+    global _channel
+    _channel = ch if isinstance(ch, discord.TextChannel) else None
+
 async def render_and_publish():
-    channel_id = state.get("channel_id")
-    if not channel_id:
-        return
-    ch = bot.get_channel(int(channel_id))
-    if not isinstance(ch, discord.TextChannel):
-        return
+    ch = _channel
+    if ch is None:
+        channel_id = state.get("channel_id")
+        if not channel_id:
+            return
+        _set_channel(bot.get_channel(int(channel_id)))  # not resolved in on_ready yet
+        ch = _channel
+        if ch is None:
+            return
 
     content, open_pct, realized_pct = await render_content_and_maybe_autoclose()
     emb = build_embed(open_pct, realized_pct)
     msg_id = state.get("message_id")
 
+    global _cached_msg
     view = _persistent_view  # will be set in on_ready
+    if _cached_msg is not None and msg_id and _cached_msg.channel.id == ch.id and _cached_msg.id == int(msg_id):
+        try:
+            await _cached_msg.edit(content=content, embed=emb, view=view)
+            return
+        except (discord.NotFound, discord.HTTPException):
+            _cached_msg = None  # deleted or stale; look it up again below
     if msg_id:
         try:
             msg = await ch.fetch_message(int(msg_id))
             await msg.edit(content=content, embed=emb, view=view)
+            _cached_msg = msg
             return
         except Exception:
             pass
@@ -311,12 +381,23 @@ async def render_and_publish():
         await new_msg.pin()
     except Exception:
         pass
+    _cached_msg = new_msg
     state["message_id"] = new_msg.id
-    save_data(state)
+    request_save()
 
 # ------------- Updater loop --------------
+MARKET_TZ = ZoneInfo("America/New_York")
+
+def _market_hours(now: Optional[datetime] = None) -> bool:
+    # Mon-Fri 09:00-17:00 New York: the cash session plus a little slack on both ends
+    now = now or datetime.now(MARKET_TZ)
+    return now.weekday() < 5 and 9 <= now.hour < 17
+
 @tasks.loop(minutes=5)
 async def updater():
+    # prices don't move overnight/weekends, and with no open positions there's nothing to refresh
+    if not state.get("positions") or not _market_hours():
+        return
     try:
         await render_and_publish()
     except Exception:
@@ -362,7 +443,8 @@ async def pnl_setchannelid(interaction: discord.Interaction, raw_id: str):
         return await interaction.response.send_message("Channel not found or not a text channel.", ephemeral=True)
 
     state["channel_id"] = ch.id
-    save_data(state)
+    _set_channel(ch)
+    request_save()
 
     # (optional) lock channel read-only for @everyone, allow bot
     try:
@@ -387,7 +469,8 @@ async def pnl_setchannelid(interaction: discord.Interaction, raw_id: str):
 @require_owner()
 async def pnl_setchannel(interaction: discord.Interaction, channel: discord.TextChannel):
     state["channel_id"] = channel.id
-    save_data(state)
+    _set_channel(channel)
+    request_save()
 
     # Lock channel read-only for everyone; allow bot to post
     try:
@@ -432,10 +515,10 @@ async def pnl_add(interaction: discord.Interaction, ticker: str, entry: float, s
     t = ticker.upper().strip()
     if entry <= 0 or stop <= 0 or target <= 0:
         return await interaction.response.send_message("Values must be positive.", ephemeral=True)
-    state.setdefault("positions", {})[t] = {
-        "entry": entry, "stop": stop, "target": target, "created_at": _now_iso()
-    }
-    save_data(state)
+    positions = state.setdefault("positions", {})
+    positions[t] = {"entry": entry, "stop": stop, "target": target, "created_at": _now_iso()}
+    state["positions"] = dict(sorted(positions.items()))
+    request_save()
     await interaction.response.send_message(f"Added {t}: entry={entry}, stop={stop}, target={target}.", ephemeral=True)
     await render_and_publish()
 
@@ -456,7 +539,7 @@ async def pnl_set(interaction: discord.Interaction, ticker: str,
     if entry and entry > 0:  pos["entry"] = entry
     if stop and stop > 0:    pos["stop"] = stop
     if target and target > 0: pos["target"] = target
-    save_data(state)
+    request_save()
     await interaction.response.send_message(f"Updated {t}.", ephemeral=True)
     await render_and_publish()
 
@@ -467,7 +550,7 @@ async def pnl_remove(interaction: discord.Interaction, ticker: str):
     t = ticker.upper().strip()
     if t in state.get("positions", {}):
         state["positions"].pop(t, None)
-        save_data(state)
+        request_save()
         await interaction.response.send_message(f"Removed {t}.", ephemeral=True)
         await render_and_publish()
     else:
@@ -488,6 +571,7 @@ async def pnl_close(interaction: discord.Interaction, ticker: str,
         return await interaction.response.send_message("Ticker not found in open positions.", ephemeral=True)
 
     if exit_price is None:
+        invalidate_price(t)  # close at a fresh quote, not one up to PRICE_TTL old
         last = await fetch_last_price(t)
         if last is None:
             return await interaction.response.send_message("Could not fetch price. Provide exit_price.", ephemeral=True)
@@ -508,8 +592,8 @@ async def pnl_close(interaction: discord.Interaction, ticker: str,
         "closed_at": _now_iso(),
         "pnl_pct": pct(float(pos["entry"]), float(exit_price)),
     }
-    _append_closed(state, rec)
-    save_data(state)
+    append_closed(state, rec)
+    request_save()
     await interaction.response.send_message(
         f"Closed {t} at {exit_price} ({reason}), PnL={rec['pnl_pct']:+.2f}%.", ephemeral=True
     )
@@ -557,6 +641,9 @@ async def on_ready():
     except Exception:
         logging.exception("Slash sync failed unexpectedly.")
 
+    if state.get("channel_id"):
+        _set_channel(bot.get_channel(int(state["channel_id"])))
+
     # Start updater only after ready (avoids 'no running event loop')
     if not updater.is_running():
         updater.start()
@@ -565,3 +652,4 @@ async def on_ready():
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     bot.run(TOKEN)
+    save_data(state)  # flush anything still inside the debounce window
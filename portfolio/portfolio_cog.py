@@ -1,75 +1,123 @@
 # portfolio/portfolio_cog.py
 from __future__ import annotations
 
-import os, json, time
+import os, time, asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from typing import Dict, Optional, Tuple, List
 
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 
-import yfinance as yf
-from dateutil import tz
+# yfinance/numpy (and pandas behind them) are imported on first use, not at extension load
+
+from portfolio.storage import load_data, save_data, append_closed
+from portfolio.prices import cached_price, remember_price, invalidate_price, get_yf_session, close_yf_session
 
 # ---------- config (env-driven) ----------
 OWNER_ID = int(os.getenv("PORTFOLIO_OWNER_ID", "0"))                   # your user id; 0 = no owner check
 DEFAULT_TZ = os.getenv("DEFAULT_TZ", "Asia/Jerusalem")
-DATA_FILE = os.getenv("PORTFOLIO_DB", "portfolio/portfolio.json")
+_TZ = ZoneInfo(DEFAULT_TZ)  # resolved once, not per publish
 REFRESH_COOLDOWN_SECONDS = int(os.getenv("PORTFOLIO_REFRESH_COOLDOWN", "30"))
-CLOSED_MAX = int(os.getenv("PORTFOLIO_CLOSED_MAX", "500"))
 PORTFOLIO_CHANNEL_ID = int("1425525386665529374")
+PRICE_BATCH = 20  # symbols per bulk yf.download request
 
 
-# ---------- persistence ----------
-def _ensure_db_dir() -> None:
-    d = os.path.dirname(DATA_FILE) or "."
-    os.makedirs(d, exist_ok=True)
+# ---------- pricing / math ----------
+PRICE_TTL = REFRESH_COOLDOWN_SECONDS  # a price fetched within this window is reused
 
-def load_data() -> Dict:
-    _ensure_db_dir()
-    base = {"channel_id": None, "message_id": None, "positions": {}, "closed": []}
-    if not os.path.exists(DATA_FILE):
-        return base
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        data.setdefault("closed", [])
-        return data
-    except Exception:
-        return base
+# yfinance is blocking; all lookups run here so they neither stall the event loop
+# nor grow past a fixed number of threads
+_price_pool = ThreadPoolExecutor(max_workers=10, thread_name_prefix="pnl-price")
 
-def save_data(d: Dict) -> None:
-    _ensure_db_dir()
-    tmp = DATA_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(d, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, DATA_FILE)
+async def _in_price_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_price_pool, fn, *args)
 
-# ---------- pricing / math ----------
 async def fetch_last_price(ticker: str) -> Optional[float]:
+    cached = cached_price(ticker, PRICE_TTL)
+    if cached is not None:
+        return cached
+    return remember_price(ticker, await _in_price_pool(_fetch_last_price_uncached, ticker))
+
+def _fetch_last_price_uncached(ticker: str) -> Optional[float]:
+    import yfinance as yf
+    # cheapest first: fast_info is one quote call, no DataFrame
     try:
-        t = yf.Ticker(ticker)
-        try:
-            fi = getattr(t, "fast_info", None)
-            if fi:
-                lp = getattr(fi, "last_price", None) or fi.get("last_price")
-                if lp is not None:
-                    return float(lp)
-        except Exception:
-            pass
+        fi = yf.Ticker(ticker, session=get_yf_session()).fast_info
+        lp = fi["last_price"]
+        if lp is not None:
+            return float(lp)
+    except Exception:
+        pass
+    try:
+        df = yf.download(ticker, period="1d", interval="1m", progress=False, threads=False, session=get_yf_session())
+        closes = df["Close"].dropna() if df is not None and len(df) > 0 else ()
+        if len(closes) > 0:
+            last = closes.iloc[-1]
+            # newer yfinance keeps a (field, ticker) column level even for one symbol
+            return float(last.iloc[0] if hasattr(last, "iloc") else last)
+    except Exception:
+        pass
+    return None
+
+def _last_closes(df, tickers: List[str]) -> Dict[str, float]:
+    """{ticker: last non-NaN Close} from a (possibly multi-ticker) yf.download frame."""
+    out: Dict[str, float] = {}
+    if df is None or len(df) == 0:
+        return out
+    multi = getattr(df.columns, "nlevels", 1) > 1
+    for tkr in tickers:
         try:
-            df = t.history(period="1d", interval="1m")
-            if df is not None and len(df) > 0:
-                return float(df["Close"].iloc[-1])
+            if multi:
+                if tkr not in df.columns.get_level_values(0):
+                    continue
+                closes = df[tkr]["Close"].dropna()
+            else:
+                closes = df["Close"].dropna()  # single symbol on older yfinance: flat columns
+            if len(closes) > 0:
+                out[tkr] = float(closes.iloc[-1])
         except Exception:
-            pass
-        df = yf.download(ticker, period="5d", interval="1d", progress=False)
-        if df is not None and len(df) > 0:
-            return float(df["Close"].iloc[-1])
-        return None
+            continue
+    return out
+
+def _download_last(tickers: List[str], period: str, interval: str) -> Dict[str, float]:
+    import yfinance as yf
+    try:
+        df = yf.download(" ".join(tickers), period=period, interval=interval,
+                         group_by="ticker", threads=True, progress=False, session=get_yf_session())
     except Exception:
-        return None
+        return {}
+    return _last_closes(df, tickers)
+
+def _fetch_last_prices_blocking(tickers: List[str]) -> Dict[str, Optional[float]]:
+    prices: Dict[str, Optional[float]] = {}
+    for i in range(0, len(tickers), PRICE_BATCH):
+        chunk = tickers[i:i + PRICE_BATCH]
+        got = _download_last(chunk, "1d", "1m")
+        missing = [t for t in chunk if t not in got]
+        if missing:  # no intraday bars (pre-market, halted, ...): last daily close
+            got.update(_download_last(missing, "5d", "1d"))
+        for t in chunk:
+            prices[t] = got.get(t)
+    return prices
+
+async def fetch_last_prices(tickers: List[str]) -> Dict[str, Optional[float]]:
+    """Last price per ticker with one bulk yf.download per PRICE_BATCH symbols (run off the event loop)."""
+    prices: Dict[str, Optional[float]] = {}
+    stale = []
+    for t in tickers:
+        cached = cached_price(t, PRICE_TTL)
+        if cached is None:
+            stale.append(t)
+        else:
+            prices[t] = cached
+    if stale:
+        fetched = await _in_price_pool(_fetch_last_prices_blocking, stale)
+        for t, price in fetched.items():
+            prices[t] = remember_price(t, price)
+    return prices
 
 def pct(entry: float, last: float) -> float:
     if entry is None or last is None or entry == 0:
@@ -86,24 +134,49 @@ def distance_from_stop(last: float, stop: float) -> Optional[float]:
         return (last / stop - 1.0) * 100.0
     return None
 
+def _open_metrics(positions: Dict[str, Dict], prices: Dict[str, Optional[float]]
+                  ) -> Dict[str, Tuple[float, Optional[float], Optional[float]]]:
+    """
+    Vectorized pct / distance_from_stop / remaining_to_target for every priced position:
+    one numpy pass over arrays instead of three Python calls per row. Same edge cases
+    (entry 0 -> 0.0 PnL; zero last/stop/target -> None).
+    """
+    tickers = [t for t in positions if prices.get(t) is not None]
+    if not tickers:
+        return {}
+    import numpy as np
+    n = len(tickers)
+    entry = np.fromiter((float(positions[t]["entry"]) for t in tickers), dtype=np.float64, count=n)
+    stop = np.fromiter((float(positions[t]["stop"]) for t in tickers), dtype=np.float64, count=n)
+    target = np.fromiter((float(positions[t]["target"]) for t in tickers), dtype=np.float64, count=n)
+    last = np.fromiter((prices[t] for t in tickers), dtype=np.float64, count=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl = np.where(entry != 0, (last / entry - 1.0) * 100.0, 0.0)
+        to_stop = (last / stop - 1.0) * 100.0
+        to_tgt = (target / last - 1.0) * 100.0
+    has_stop = (last != 0) & (stop != 0)
+    has_tgt = (last != 0) & (target != 0)
+    return {
+        t: (p, s if hs else None, g if hg else None)
+        for t, p, s, g, hs, hg in zip(tickers, pnl.tolist(), to_stop.tolist(), to_tgt.tolist(),
+                                      has_stop.tolist(), has_tgt.tolist())
+    }
+
+_POS_E, _NEG_E = "🟢", "🔴"
+
 def fmt_pct(x: Optional[float]) -> str:
-    if x is None:
-        return "—"
-    emoji = "🟢" if x >= 0 else "🔴"
-    return f"{emoji}{x:+.2f}%"
+    return "—" if x is None else f"{_POS_E if x >= 0 else _NEG_E}{x:+.2f}%"
+
+def _fmt_row(tkr: str, prices: Tuple[float, ...], *cells: str) -> List[str]:
+    """Table row: ticker, each price to 2 dp, then cells that are already text."""
+    return [tkr, *[f"{x:.2f}" for x in prices], *cells]
 
 def monospaced_table(rows: List[List[str]]) -> str:
-    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
-    lines = []
-    for ridx, r in enumerate(rows):
-        parts = []
-        for i, cell in enumerate(r):
-            pad = " " * (widths[i] - len(cell))
-            parts.append(cell + pad)
-        line = "  ".join(parts)
-        lines.append(line)
-        if ridx == 0:
-            lines.append("-" * len(line))
+    # column-major widths, then one prebuilt left-aligned format string for every row
+    widths = [max(map(len, col)) for col in zip(*rows)]
+    fmt = "  ".join("{:<%d}" % w for w in widths)
+    lines = [fmt.format(*r) for r in rows]
+    lines.insert(1, "-" * len(lines[0]))
     return "```\n" + "\n".join(lines) + "\n```"
 
 def green_embed(title: str) -> discord.Embed:
@@ -120,6 +193,12 @@ class PortfolioCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.state = load_data()
+        self._dirty = False
+        self._last_rendered_hash: Optional[int] = None
+        self._render_task: Optional[asyncio.Future] = None
+        self._render_again = False
+        self._cached_render: Optional[Tuple[int, float, Tuple[str, float, float]]] = None  # (key, ts, result)
+        self._sorted_tickers: Optional[List[str]] = None  # render order; reset when the ticker set changes
         self._view = self.RefreshView(self)
 
     # persistent refresh button
@@ -156,12 +235,15 @@ class PortfolioCog(commands.Cog):
             self.updater.start()
         if PORTFOLIO_CHANNEL_ID and not self.state.get("channel_id"):
             self.state["channel_id"] = PORTFOLIO_CHANNEL_ID
-            save_data(self.state)
+            self._dirty = True
             await self.render_and_publish()
 
     def cog_unload(self):
         if self.updater.is_running():
             self.updater.cancel()
+        self._maybe_save()
+        _price_pool.shutdown(wait=False)  # a reload imports this module again with a fresh pool
+        close_yf_session()  # portfolio.prices survives the reload; the next lookup opens a new session
 
     # owner check
     @staticmethod
@@ -169,7 +251,20 @@ class PortfolioCog(commands.Cog):
         return (OWNER_ID == 0) or (inter.user and inter.user.id == OWNER_ID)
 
     # ---------- renderer ----------
+    def _render_key(self) -> int:
+        # everything the tables depend on apart from prices
+        positions = self.state.get("positions", {}) or {}
+        return hash((
+            tuple((t, p.get("entry"), p.get("stop"), p.get("target")) for t, p in positions.items()),
+            self.state.get("closed_count", 0), self.state.get("closed_sum", 0.0),
+        ))
+
     async def render_content_and_maybe_autoclose(self) -> Tuple[str, float, float]:
+        # within the cooldown the quotes come from the price cache anyway: reuse the last render
+        snap = self._cached_render
+        if snap and time.monotonic() - snap[1] < REFRESH_COOLDOWN_SECONDS and snap[0] == self._render_key():
+            return snap[2]
+
         positions = self.state.get("positions", {}) or {}
         closed = self.state.get("closed", []) or []
 
@@ -177,30 +272,35 @@ class PortfolioCog(commands.Cog):
         rows_open = [["Ticker", "Entry", "Stop", "Target", "Price", "%PnL", "% to Stop", "% to Target", "Status"]]
         to_close: List[Tuple[str, float, str]] = []
 
-        for tkr, p in sorted(positions.items()):
+        if self._sorted_tickers is None:
+            self._sorted_tickers = sorted(positions)
+        tickers = self._sorted_tickers
+        # one bulk request per PRICE_BATCH symbols instead of a lookup per ticker
+        prices = await fetch_last_prices(tickers)
+        metrics = _open_metrics(positions, prices)
+
+        for tkr in tickers:
+            p = positions.get(tkr)
+            if p is None:
+                continue  # removed by a command while prices were loading
             entry = float(p["entry"]); stop = float(p["stop"]); target = float(p["target"])
-            last = await fetch_last_price(tkr)
+            last = prices.get(tkr)
             if last is None:
-                rows_open.append([tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", "—","—","—","—","—"])
+                rows_open.append(_fmt_row(tkr, (entry, stop, target), "—","—","—","—","—"))
                 continue
 
-            pnl = pct(entry, last)
-            perfs_open.append(pnl)
-            to_stop = distance_from_stop(last, stop)
-            to_tgt  = remaining_to_target(last, target)
-            status = "🟢" if last >= entry else "🔴"
-            reason = None
             if last <= stop:
-                status = "⛔ below stop"; reason = "stop"
-            elif last >= target:
-                status = "🎯 target hit"; reason = "target"
+                to_close.append((tkr, last, "stop"))
+                continue  # moves to Closed Trades below; keep it out of the open table/average
+            if last >= target:
+                to_close.append((tkr, last, "target"))
+                continue
 
-            rows_open.append([
-                tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", f"{last:.2f}",
-                fmt_pct(pnl), fmt_pct(to_stop), fmt_pct(to_tgt), status
-            ])
-            if reason:
-                to_close.append((tkr, last, reason))
+            pnl, to_stop, to_tgt = metrics[tkr]
+            perfs_open.append(pnl)
+            status = _POS_E if last >= entry else _NEG_E
+            rows_open.append(_fmt_row(tkr, (entry, stop, target, last),
+                                      fmt_pct(pnl), fmt_pct(to_stop), fmt_pct(to_tgt), status))
 
         # auto-close
         if to_close:
@@ -208,56 +308,34 @@ class PortfolioCog(commands.Cog):
                 pos = self.state["positions"].pop(tkr, None)
                 if not pos:
                     continue
+                self._sorted_tickers = None
                 rec = {
                     "ticker": tkr, "entry": float(pos["entry"]), "stop": float(pos["stop"]),
                     "target": float(pos["target"]), "exit": float(exit_price), "reason": reason,
                     "created_at": pos.get("created_at"), "closed_at": _now_iso(),
                     "pnl_pct": pct(float(pos["entry"]), float(exit_price)),
                 }
-                self.state.setdefault("closed", []).append(rec)
-                if len(self.state["closed"]) > CLOSED_MAX:
-                    self.state["closed"] = self.state["closed"][-CLOSED_MAX:]
-            save_data(self.state)
+                append_closed(self.state, rec)
+            self._dirty = True
 
         # closed table
         rows_closed = [["Ticker", "Entry", "Stop", "Target", "Exit", "%PnL", "Reason", "Closed At"]]
         perfs_closed: List[float] = []
-        for rec in reversed(self.state.get("closed", [])):
+        for rec in self.state.get("closed", []):  # newest first
             pnlv = float(rec.get("pnl_pct", pct(float(rec["entry"]), float(rec["exit"]))))
             perfs_closed.append(pnlv)
-            rows_closed.append([
+            rows_closed.append(_fmt_row(
                 rec["ticker"],
-                f"{float(rec['entry']):.2f}",
-                f"{float(rec['stop']):.2f}",
-                f"{float(rec['target']):.2f}",
-                f"{float(rec['exit']):.2f}",
+                (float(rec["entry"]), float(rec["stop"]), float(rec["target"]), float(rec["exit"])),
                 fmt_pct(pnlv),
                 rec.get("reason", "manual"),
                 (rec.get("closed_at") or "")[:10],
-            ])
+            ))
 
-        # recompute open table & metrics (post auto-close)
-        positions = self.state.get("positions", {}) or {}
-        final_rows_open = [["Ticker", "Entry", "Stop", "Target", "Price", "%PnL", "% to Stop", "% to Target", "Status"]]
-        perfs_open_final: List[float] = []
-        for tkr, p in sorted(positions.items()):
-            entry = float(p["entry"]); stop = float(p["stop"]); target = float(p["target"])
-            last = await fetch_last_price(tkr)
-            if last is None:
-                final_rows_open.append([tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", "—","—","—","—","—"])
-                continue
-            pnl = pct(entry, last); perfs_open_final.append(pnl)
-            to_stop = distance_from_stop(last, stop); to_tgt = remaining_to_target(last, target)
-            status = "🟢" if last >= entry else "🔴"
-            final_rows_open.append([
-                tkr, f"{entry:.2f}", f"{stop:.2f}", f"{target:.2f}", f"{last:.2f}",
-                fmt_pct(pnl), fmt_pct(to_stop), fmt_pct(to_tgt), status
-            ])
-
-        table_open   = monospaced_table(final_rows_open) if len(final_rows_open) > 1 else "No open positions."
+        table_open   = monospaced_table(rows_open)       if len(rows_open)       > 1 else "No open positions."
         table_closed = monospaced_table(rows_closed)     if len(rows_closed)     > 1 else "No closed trades yet."
 
-        open_pct     = (sum(perfs_open_final) / max(1, len(perfs_open_final))) if perfs_open_final else 0.0
+        open_pct     = (sum(perfs_open)       / max(1, len(perfs_open)))       if perfs_open       else 0.0
         realized_pct = (sum(perfs_closed)     / max(1, len(perfs_closed)))     if perfs_closed     else 0.0
 
         content = (
@@ -265,17 +343,46 @@ class PortfolioCog(commands.Cog):
             "**Closed Trades**\n" + table_closed + "\n"
             "_(Equal-weight averages; amounts intentionally omitted)_"
         )
+        self._cached_render = (self._render_key(), time.monotonic(), (content, open_pct, realized_pct))
         return content, open_pct, realized_pct
 
     def _build_embed(self, open_pct: float, realized_pct: float) -> discord.Embed:
-        tzinfo = tz.gettz(DEFAULT_TZ)
-        now_str = datetime.now(tzinfo).strftime("%Y-%m-%d %H:%M")
-        eo = "🟢" if open_pct >= 0 else "🔴"
-        er = "🟢" if realized_pct >= 0 else "🔴"
+        now_str = datetime.now(_TZ).strftime("%Y-%m-%d %H:%M")
+        eo = _POS_E if open_pct >= 0 else _NEG_E
+        er = _POS_E if realized_pct >= 0 else _NEG_E
         title = f"{now_str} • Open PnL: {eo}{open_pct:+.2f}% • Realized: {er}{realized_pct:+.2f}%"
         return green_embed(title) if open_pct >= 0 else red_embed(title)
 
+    def _maybe_save(self) -> None:
+        # commands and auto-close only mark the state dirty; it is written once per render
+        if self._dirty:
+            save_data(self.state)
+            self._dirty = False
+
     async def render_and_publish(self):
+        """
+        Single-flight: the button, the updater and commands share one in-flight render.
+        A caller arriving mid-render (possibly after mutating state) gets one follow-up
+        pass queued, so its change is still published before the shared await returns.
+        """
+        if self._render_task is not None and not self._render_task.done():
+            self._render_again = True
+        else:
+            self._render_task = asyncio.ensure_future(self._render_until_settled())
+        # shield: an interaction timing out must not cancel everyone else's render
+        await asyncio.shield(self._render_task)
+
+    async def _render_until_settled(self):
+        while True:
+            self._render_again = False
+            try:
+                await self._publish()
+            finally:
+                self._maybe_save()
+            if not self._render_again:
+                return
+
+    async def _publish(self):
         ch_id = self.state.get("channel_id")
         if not ch_id:
             return
@@ -284,13 +391,19 @@ class PortfolioCog(commands.Cog):
             return
 
         content, open_pct, realized_pct = await self.render_content_and_maybe_autoclose()
-        emb = self._build_embed(open_pct, realized_pct)
         msg_id = self.state.get("message_id")
 
+        # the title carries a HH:MM stamp, so compare what it reports rather than the title itself
+        key = hash((ch.id, msg_id, content, f"{open_pct:+.2f}", f"{realized_pct:+.2f}"))
+        if msg_id and key == self._last_rendered_hash:
+            return  # nothing visible changed; skip the Discord edit
+
+        emb = self._build_embed(open_pct, realized_pct)
         if msg_id:
             try:
                 msg = await ch.fetch_message(int(msg_id))
                 await msg.edit(content=content, embed=emb, view=self._view)
+                self._last_rendered_hash = key
                 return
             except Exception:
                 pass
@@ -301,7 +414,8 @@ class PortfolioCog(commands.Cog):
         except Exception:
             pass
         self.state["message_id"] = new_msg.id
-        save_data(self.state)
+        self._last_rendered_hash = hash((ch.id, new_msg.id, content, f"{open_pct:+.2f}", f"{realized_pct:+.2f}"))
+        self._dirty = True
 
     # background refresh
     @tasks.loop(minutes=5)
@@ -335,7 +449,7 @@ class PortfolioCog(commands.Cog):
             if not self._owner_only(inter):
                 return await inter.response.send_message("Only the owner can do this.", ephemeral=True)
             self.state["channel_id"] = channel.id
-            save_data(self.state)
+            self._dirty = True
             try:
                 ow_all = channel.overwrites_for(channel.guild.default_role)
                 ow_all.send_messages = False
@@ -379,10 +493,11 @@ class PortfolioCog(commands.Cog):
                 await inter.followup.send("Values must be positive.", ephemeral=True)
                 return
 
+            self._sorted_tickers = None
             self.state.setdefault("positions", {})[t] = {
                 "entry": entry, "stop": stop, "target": target, "created_at": _now_iso()
             }
-            save_data(self.state)
+            self._dirty = True
 
             # Do the heavy work after defer
             await self.render_and_publish()
@@ -399,7 +514,7 @@ class PortfolioCog(commands.Cog):
             if entry and entry > 0:  pos["entry"] = entry
             if stop and stop > 0:    pos["stop"] = stop
             if target and target > 0: pos["target"] = target
-            save_data(self.state)
+            self._dirty = True
             await inter.response.send_message(f"Updated {t}.", ephemeral=True)
             await self.render_and_publish()
 
@@ -409,7 +524,8 @@ class PortfolioCog(commands.Cog):
             t = ticker.upper().strip()
             if t in self.state.get("positions", {}):
                 self.state["positions"].pop(t, None)
-                save_data(self.state)
+                self._sorted_tickers = None
+                self._dirty = True
                 await inter.response.send_message(f"Removed {t}.", ephemeral=True)
                 await self.render_and_publish()
             else:
@@ -423,7 +539,9 @@ class PortfolioCog(commands.Cog):
             pos = self.state.get("positions", {}).pop(t, None)
             if not pos:
                 return await inter.response.send_message("Ticker not found in open positions.", ephemeral=True)
+            self._sorted_tickers = None
             if exit_price is None:
+                invalidate_price(t)  # close at a fresh quote, not one up to PRICE_TTL old
                 last = await fetch_last_price(t)
                 if last is None:
                     return await inter.response.send_message("Could not fetch price. Provide exit_price.", ephemeral=True)
@@ -442,10 +560,8 @@ class PortfolioCog(commands.Cog):
                 "closed_at": _now_iso(),
                 "pnl_pct": pct(float(pos["entry"]), float(exit_price)),
             }
-            self.state.setdefault("closed", []).append(rec)
-            if len(self.state["closed"]) > CLOSED_MAX:
-                self.state["closed"] = self.state["closed"][-CLOSED_MAX:]
-            save_data(self.state)
+            append_closed(self.state, rec)
+            self._dirty = True
             await inter.response.send_message(
                 f"Closed {t} at {exit_price} ({r}), PnL={rec['pnl_pct']:+.2f}%.", ephemeral=True
             )
@@ -0,0 +1,58 @@
+# portfolio/prices.py
+"""
+Price plumbing shared by portfolio_bot.py and portfolio_cog.py.
+
+  cached_price / remember_price / invalidate_price -> short-lived last-price cache
+  get_yf_session / close_yf_session               -> one keep-alive HTTP pool for yfinance
+
+Each caller passes its own TTL, so the bot and the cog keep their own refresh windows.
+"""
+from __future__ import annotations
+
+import time, threading
+from typing import Dict, Optional, Tuple
+
+_price_cache: Dict[str, Tuple[float, float]] = {}   # ticker -> (monotonic ts, price)
+
+def cached_price(ticker: str, ttl: float) -> Optional[float]:
+    hit = _price_cache.get(ticker)
+    if hit and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+def remember_price(ticker: str, price: Optional[float]) -> Optional[float]:
+    if price is not None:
+        _price_cache[ticker] = (time.monotonic(), price)
+    return price
+
+def invalidate_price(ticker: str) -> None:
+    _price_cache.pop(ticker, None)
+
+
+def _make_yf_session():
+    # recent yfinance only accepts curl_cffi sessions; plain requests for older versions
+    try:
+        from curl_cffi import requests as curl_requests
+        return curl_requests.Session(impersonate="chrome")
+    except ImportError:
+        import requests
+        return requests.Session()
+
+# built on the first price lookup (usually from a worker thread), not at import
+_yf_session = None
+_yf_session_lock = threading.Lock()
+
+def get_yf_session():
+    global _yf_session
+    with _yf_session_lock:
+        if _yf_session is None:
+            _yf_session = _make_yf_session()
+        return _yf_session
+
+def close_yf_session() -> None:
+    """Close the pool; the next lookup builds a fresh one."""
+    global _yf_session
+    with _yf_session_lock:
+        if _yf_session is not None:
+            _yf_session.close()
+            _yf_session = None
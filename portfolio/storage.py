@@ -0,0 +1,178 @@
+# portfolio/storage.py
+"""
+Persistence shared by portfolio_bot.py and portfolio_cog.py (they use the same files).
+
+  portfolio.json  -> channel/message ids + open positions (small; atomic rewrite)
+  closed.jsonl    -> closed trades, one JSON object per line (append-only journal)
+
+In memory, state["closed"] is a deque(maxlen=CLOSED_MAX) of the newest trades, newest
+first (the order the Closed Trades table shows them), and
+state["closed_sum"] / state["closed_count"] track their %PnL for the realized average.
+Those three keys are derived and never written to portfolio.json.
+"""
+from __future__ import annotations
+
+import os, json, mmap
+from collections import deque
+from typing import Dict, Optional
+
+try:
+    import orjson  # optional: much faster (de)serialization
+except ImportError:
+    orjson = None
+
+DATA_FILE = os.getenv("PORTFOLIO_DB", "portfolio/portfolio.json")
+CLOSED_FILE = os.getenv("PORTFOLIO_CLOSED_DB", os.path.join(os.path.dirname(DATA_FILE) or ".", "closed.jsonl"))
+CLOSED_MAX = int(os.getenv("PORTFOLIO_CLOSED_MAX", "500"))
+
+
+def _dumps(obj, indent: bool = False) -> bytes:
+    if orjson is not None:
+        # OPT_NON_STR_KEYS: stringify int keys like json.dumps does instead of raising
+        opt = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=opt)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def _loads(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def _ensure_db_dir() -> None:
+    d = os.path.dirname(DATA_FILE) or "."
+    os.makedirs(d, exist_ok=True)
+
+def _fsync_dir(path: str) -> None:
+    # make the rename itself durable (POSIX only; Windows can't open directories)
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ---------- closed-trades journal ----------
+def _drop_torn_tail(f) -> None:
+    """Cut a torn last line (crash mid-append) so the next record starts on its own line."""
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return
+    pos = end
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        i = f.read(step).rfind(b"\n")
+        if i != -1:
+            f.truncate(pos + i + 1)
+            return
+    f.truncate(0)
+
+def _write_closed_lines(recs, mode: str) -> None:
+    with open(CLOSED_FILE, mode + "b" + ("+" if mode == "a" else "")) as f:
+        if mode == "a":
+            _drop_torn_tail(f)
+        for rec in recs:
+            f.write(_dumps(rec) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _load_closed() -> list:
+    """Newest-first list of the last CLOSED_MAX journal entries."""
+    if not os.path.exists(CLOSED_FILE) or os.path.getsize(CLOSED_FILE) == 0:
+        return []
+    out = []
+    # the journal only grows; walk it backwards through an mmap so startup cost
+    # depends on CLOSED_MAX, not on how many trades were ever closed
+    with open(CLOSED_FILE, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = len(mm)
+        while pos > 0 and len(out) < CLOSED_MAX:
+            start = mm.rfind(b"\n", 0, pos - 1) + 1
+            line = mm[start:pos].strip()
+            pos = start
+            if not line:
+                continue
+            try:
+                out.append(_loads(line))
+            except ValueError:
+                continue  # torn last line after a crash
+    return out
+
+def _pnl_of(rec: Dict) -> float:
+    if "pnl_pct" in rec:
+        return float(rec["pnl_pct"])
+    entry = float(rec["entry"])
+    return (float(rec["exit"]) / entry - 1.0) * 100.0 if entry else 0.0
+
+def _set_closed(data: Dict, closed) -> None:
+    data["closed"] = closed = deque(closed, maxlen=CLOSED_MAX)
+    data["closed_sum"] = sum(_pnl_of(r) for r in closed)
+    data["closed_count"] = len(closed)
+
+def append_closed(data: Dict, rec: Dict) -> None:
+    """Journal one closed trade (O(1) bytes on disk) and keep the in-memory tail bounded."""
+    _ensure_db_dir()
+    _write_closed_lines([rec], "a")
+    closed = data.get("closed")
+    if not isinstance(closed, deque) or "closed_sum" not in data:
+        _set_closed(data, closed or ())
+        closed = data["closed"]
+    if len(closed) == closed.maxlen:
+        # appendleft below drops the oldest trade off the right; take it out of the running sum
+        data["closed_sum"] -= _pnl_of(closed[-1])
+        data["closed_count"] -= 1
+    closed.appendleft(rec)
+    data["closed_sum"] += _pnl_of(rec)
+    data["closed_count"] += 1
+
+
+# ---------- main state file ----------
+def load_data() -> Dict:
+    _ensure_db_dir()
+    base = {"channel_id": None, "message_id": None, "positions": {}}
+    if not os.path.exists(DATA_FILE):
+        _set_closed(base, _load_closed())
+        return base
+    try:
+        with open(DATA_FILE, "rb") as f:
+            data = _loads(f.read())
+    except Exception:
+        _set_closed(base, _load_closed())
+        return base
+
+    # renderers iterate positions as-is, so keep them in ticker order
+    data["positions"] = dict(sorted((data.get("positions") or {}).items()))
+    legacy = data.pop("closed", None)
+    if legacy and not os.path.exists(CLOSED_FILE):
+        # one-time migration from the old single-file layout
+        _write_closed_lines(legacy, "w")
+    _set_closed(data, _load_closed())
+    # a close is journaled before the debounced save drops the position; a crash in
+    # between leaves it in both places, and the journal wins
+    done = {(r.get("ticker"), r.get("created_at")) for r in data["closed"] if r.get("created_at")}
+    if done:
+        data["positions"] = {t: p for t, p in data["positions"].items()
+                             if (t, p.get("created_at")) not in done}
+    return data
+
+_DERIVED_KEYS = ("closed", "closed_sum", "closed_count")
+_last_saved: Optional[bytes] = None  # serialized state last written; identical saves are skipped
+
+def save_data(data: Dict) -> None:
+    """Atomic, fsync'd rewrite of portfolio.json; closed trades live in the journal instead."""
+    global _last_saved
+    blob = _dumps({k: v for k, v in data.items() if k not in _DERIVED_KEYS}, indent=True)
+    if blob == _last_saved:
+        return
+    _ensure_db_dir()
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, DATA_FILE)
+    _fsync_dir(os.path.dirname(DATA_FILE) or ".")
+    _last_saved = blob
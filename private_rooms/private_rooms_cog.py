@@ -5,8 +5,10 @@ import os
 import re
 import unicodedata
 import asyncio
+import heapq
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Set, Tuple
+from typing import Optional, Dict, List, Tuple
 
 import discord
 from discord.ext import commands, tasks
@@ -20,8 +22,13 @@ CAPACITY = int(os.getenv("PRIVATE_ROOMS_CAPACITY", "450"))
 TTL_MIN = int(os.getenv("PRIVATE_ROOMS_TTL_MINUTES", "60"))                 # time-to-live (hard limit)
 INACTIVITY_MIN = int(os.getenv("PRIVATE_ROOMS_INACTIVITY_MINUTES", "60"))   # inactivity window
 SWEEP_INTERVAL_MIN = int(os.getenv("PRIVATE_ROOMS_SWEEP_INTERVAL_MINUTES", "5"))
+PRUNE_CONCURRENCY = int(os.getenv("PRIVATE_ROOMS_PRUNE_CONCURRENCY", "5"))  # parallel channel deletes per sweep
 WELCOME_GRACE_MIN = int(os.getenv("PRIVATE_ROOMS_WELCOME_GRACE_MINUTES", "3"))
 
+# the prune loop works in epoch seconds
+INACTIVITY_SEC = INACTIVITY_MIN * 60
+WELCOME_GRACE_SEC = WELCOME_GRACE_MIN * 60
+
 TOPIC_PREFIX_OWNER = "OWNER:"
 TOPIC_PREFIX_EXPIRES = "EXPIRES:"   # epoch seconds UTC
 ROOM_SUFFIX = "privateroom"
@@ -30,77 +37,88 @@ def now_utc() -> datetime:
     return datetime.now(tz=timezone.utc)
 
 # ---------- Helpers ----------
+# any run of chars outside [a-z0-9_] (dashes included) becomes one "-": replace + squash in one pass
+_SLUG_RE = re.compile(r"[^a-z0-9_]+")
+
 def slugify_username(name: str) -> str:
-    name = unicodedata.normalize("NFKD", name)
-    name = name.encode("ascii", "ignore").decode("ascii", "ignore").lower()
-    name = re.sub(r"[^a-z0-9_-]+", "-", name).strip("-")
-    name = re.sub(r"-{2,}", "-", name)
-    if not name:
-        name = "user"
-    return name[:80]
-
-def build_room_name_for(member: discord.Member, existing_names: Optional[Set[str]] = None) -> str:
-    base = f"{slugify_username(member.name)}_{ROOM_SUFFIX}"
-    name = base
-    if existing_names is None:
-        return name[:100]
-    i = 2
-    while name in existing_names or len(name) > 100:
-        candidate = f"{base}-{i}"
-        if len(candidate) <= 100:
-            name = candidate
-            i += 1
-        else:
-            base = base[: max(0, 100 - len(f"-{i}"))]
-            name = f"{base}-{i}"
-            i += 1
-    return name
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    return _SLUG_RE.sub("-", name).strip("-")[:80] or "user"
+
+def build_room_name_for(member: discord.Member) -> str:
+    # A member.id tail keeps same-slug names apart without scanning the category's channel names.
+    # At most 80 + 5 + 13 chars, inside Discord's 100 limit.
+    return f"{slugify_username(member.name)}-{member.id % 10000}_{ROOM_SUFFIX}"
 
 def make_topic(owner_id: int, expires_epoch: int) -> str:
     return f"{TOPIC_PREFIX_OWNER}{owner_id};{TOPIC_PREFIX_EXPIRES}{expires_epoch}"
 
+# make_topic() output, tolerating case/whitespace and a missing EXPIRES part
+_TOPIC_RE = re.compile(r"\s*OWNER:\s*(\d+)\s*(?:;\s*EXPIRES:\s*(\d+)\s*)?;?\s*", re.IGNORECASE)
+
 def parse_topic(topic: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
     """
     Returns (owner_id, expires_epoch) if present, else (None, None).
     Expected format: "OWNER:<id>;EXPIRES:<epoch>"
     """
-    if not topic:
+    m = _TOPIC_RE.fullmatch(topic) if topic else None
+    if not m:
         return None, None
-    parts = [p.strip() for p in topic.split(";") if p.strip()]
-    owner_id = None
-    expires = None
-    for p in parts:
-        if p.upper().startswith(TOPIC_PREFIX_OWNER):
-            try:
-                owner_id = int(p.split(":", 1)[1].strip())
-            except Exception:
-                pass
-        elif p.upper().startswith(TOPIC_PREFIX_EXPIRES):
-            try:
-                expires = int(p.split(":", 1)[1].strip())
-            except Exception:
-                pass
-    return owner_id, expires
+    return int(m[1]), (int(m[2]) if m[2] else None)
 
-async def get_last_activity_at(ch: discord.TextChannel) -> datetime:
-    """Return last activity timestamp in UTC: last message time, else creation time."""
-    if ch.last_message_id:
-        try:
-            msg = await ch.fetch_message(ch.last_message_id)
-            return msg.created_at.replace(tzinfo=timezone.utc)
-        except Exception:
-            pass
-    try:
-        async for msg in ch.history(limit=1, oldest_first=False):
-            return msg.created_at.replace(tzinfo=timezone.utc)
-    except Exception:
-        pass
-    return ch.created_at.replace(tzinfo=timezone.utc)
+def snowflake_ts(snowflake_id: int) -> int:
+    """Epoch seconds encoded in a Discord snowflake (no datetime allocation)."""
+    return ((snowflake_id >> 22) + discord.utils.DISCORD_EPOCH) // 1000
+
+def get_last_activity_ts(ch: discord.TextChannel) -> int:
+    """
+    Return last activity as epoch seconds: last message time, else creation time.
+    The time is decoded from the cached last_message_id snowflake, so no REST call is made.
+    """
+    return snowflake_ts(ch.last_message_id or ch.id)
+
+
+@dataclass(slots=True)
+class RoomMeta:
+    """In-memory state of one room, parsed once from its channel topic."""
+    channel_id: int
+    guild_id: int
+    owner_id: int
+    expires_ts: Optional[int]
+    created_ts: int
+    last_activity_ts: int
+    topic: str  # the topic string this was parsed from
+
+    def due_ts(self) -> int:
+        """Epoch second at which the room hits its TTL or inactivity limit (never inside the welcome grace)."""
+        due = self.last_activity_ts + INACTIVITY_SEC
+        if self.expires_ts:
+            due = min(due, self.expires_ts)
+        return max(due, self.created_ts + WELCOME_GRACE_SEC)
 
 
 class PrivateRooms(commands.Cog):
+    # shared by every room: discord.py only reads these when serializing the create request
+    _HIDDEN_OW = discord.PermissionOverwrite(view_channel=False)
+    _MEMBER_OW = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+    _STAFF_OW = discord.PermissionOverwrite(
+        view_channel=True,
+        send_messages=True,
+        read_message_history=True,
+        manage_messages=True
+    )
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # guild id -> {owner id -> room}; built on first use per guild, then kept
+        # current by the channel create/update/delete listeners below
+        self._owner_index: Dict[int, Dict[int, discord.TextChannel]] = {}
+        self._category_by_guild: Dict[int, int] = {}  # guild id -> CATEGORY_NAME category id
+        self._bots_by_guild: Dict[int, List[discord.Member]] = {}
+        self._rooms: Dict[int, RoomMeta] = {}  # channel id -> meta, for every indexed room
+        # min-heap of (due_epoch, guild_id, channel_id); _next_due holds each indexed room's
+        # live entry, so entries superseded by a later reschedule are skipped when popped
+        self._expiry_heap: List[Tuple[int, int, int]] = []
+        self._next_due: Dict[int, int] = {}
         # periodic prune loop
         self._prune_loop.change_interval(minutes=SWEEP_INTERVAL_MIN)
         self._prune_loop.start()
@@ -112,60 +130,167 @@ class PrivateRooms(commands.Cog):
             pass
 
     # ---------- Utilities ----------
-    async def _ensure_category(self, guild: discord.Guild) -> discord.CategoryChannel:
+    def _get_category(self, guild: discord.Guild) -> Optional[discord.CategoryChannel]:
+        """CATEGORY_NAME category for this guild; resolved by name once, then by cached id."""
+        cat_id = self._category_by_guild.get(guild.id)
+        if cat_id is not None:
+            cat = guild.get_channel(cat_id)
+            if isinstance(cat, discord.CategoryChannel):
+                return cat
+            self._category_by_guild.pop(guild.id, None)
         cat = discord.utils.get(guild.categories, name=CATEGORY_NAME)
+        if cat is not None:
+            self._category_by_guild[guild.id] = cat.id
+        return cat
+
+    async def _ensure_category(self, guild: discord.Guild) -> discord.CategoryChannel:
+        cat = self._get_category(guild)
         if cat is None:
             cat = await guild.create_category(CATEGORY_NAME, reason="Create private rooms category")
+            self._category_by_guild[guild.id] = cat.id
         return cat
 
+    def _guild_bots(self, guild: discord.Guild) -> List[discord.Member]:
+        """Bot members of the guild: one guild.members scan, then kept by the member listeners."""
+        bots = self._bots_by_guild.get(guild.id)
+        if bots is None:
+            bots = self._bots_by_guild[guild.id] = [m for m in guild.members if m.bot]
+        return bots
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        bots = self._bots_by_guild.get(member.guild.id)
+        if member.bot and bots is not None and all(b.id != member.id for b in bots):
+            bots.append(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        bots = self._bots_by_guild.get(member.guild.id)
+        if member.bot and bots is not None:
+            bots[:] = [b for b in bots if b.id != member.id]
+
     def _build_overwrites(
         self,
         guild: discord.Guild,
         owner: discord.Member
     ) -> Dict[discord.abc.Snowflake, discord.PermissionOverwrite]:
         overwrites: Dict[discord.abc.Snowflake, discord.PermissionOverwrite] = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            owner: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
+            guild.default_role: self._HIDDEN_OW,
+            owner: self._MEMBER_OW,
         }
         # Allow all bots
-        for m in guild.members:
-            if m.bot:
-                overwrites[m] = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+        for m in self._guild_bots(guild):
+            overwrites[m] = self._MEMBER_OW
         # Allow staff roles (optional)
         for role_id in STAFF_ROLE_IDS:
             role = guild.get_role(role_id)
             if role:
-                overwrites[role] = discord.PermissionOverwrite(
-                    view_channel=True,
-                    send_messages=True,
-                    read_message_history=True,
-                    manage_messages=True
-                )
+                overwrites[role] = self._STAFF_OW
         return overwrites
 
-    async def _find_owner_room(self, guild: discord.Guild, member_id: int) -> Optional[discord.TextChannel]:
-        category = discord.utils.get(guild.categories, name=CATEGORY_NAME)
-        if not category:
+    def _room_meta(self, ch: discord.TextChannel) -> Optional[RoomMeta]:
+        """
+        RoomMeta for a room channel, None if its topic names no owner.
+        The topic is only re-parsed when it changed; discord.py keeps the same str object until then.
+        """
+        topic = ch.topic or ""
+        meta = self._rooms.get(ch.id)
+        if meta is not None and meta.topic is topic:
+            return meta
+        owner_id, expires = parse_topic(topic)
+        if not owner_id:
             return None
-        for ch in category.channels:
-            if not isinstance(ch, discord.TextChannel):
-                continue
-            owner_id, _ = parse_topic(ch.topic or "")
-            if owner_id == member_id:
-                return ch
-        return None
-
-    async def _count_open_rooms(self, guild: discord.Guild) -> int:
-        category = discord.utils.get(guild.categories, name=CATEGORY_NAME)
-        if not category:
-            return 0
-        cnt = 0
-        for ch in category.channels:
-            if isinstance(ch, discord.TextChannel):
-                owner_id, _ = parse_topic(ch.topic or "")
-                if owner_id:
-                    cnt += 1
-        return cnt
+        last_ts = get_last_activity_ts(ch)
+        if meta is None:
+            meta = self._rooms[ch.id] = RoomMeta(ch.id, ch.guild.id, owner_id, expires, snowflake_ts(ch.id), last_ts, topic)
+        else:
+            meta.owner_id, meta.expires_ts, meta.topic = owner_id, expires, topic
+            meta.last_activity_ts = max(meta.last_activity_ts, last_ts)
+        return meta
+
+    # ---------- Owner index ----------
+    def _room_index(self, guild: discord.Guild) -> Dict[int, discord.TextChannel]:
+        idx = self._owner_index.get(guild.id)
+        if idx is None:
+            idx = self._owner_index[guild.id] = {}
+            category = self._get_category(guild)
+            if category:
+                for ch in category.channels:
+                    if isinstance(ch, discord.TextChannel):
+                        meta = self._room_meta(ch)
+                        if meta:
+                            idx[meta.owner_id] = ch
+                            self._schedule(meta)
+        return idx
+
+    def _drop_owner_entry(self, guild_id: int, ch_id: int, owner_id: int) -> None:
+        idx = self._owner_index.get(guild_id)
+        if idx and owner_id in idx and idx[owner_id].id == ch_id:
+            del idx[owner_id]
+
+    def _unindex_channel(self, ch: discord.abc.GuildChannel) -> None:
+        self._next_due.pop(ch.id, None)
+        meta = self._rooms.pop(ch.id, None)
+        if meta is not None:
+            self._drop_owner_entry(ch.guild.id, ch.id, meta.owner_id)
+
+    def _index_channel(self, ch: discord.abc.GuildChannel) -> None:
+        idx = self._owner_index.get(ch.guild.id)
+        if idx is None:
+            return  # not built yet; the first _room_index() call will pick it up
+        old = self._rooms.get(ch.id)
+        old_owner = old.owner_id if old is not None else None
+        meta = None
+        if isinstance(ch, discord.TextChannel) and ch.category_id == self._category_by_guild.get(ch.guild.id):
+            meta = self._room_meta(ch)  # updates `old` in place, keeping its activity time
+        if meta is None:
+            self._unindex_channel(ch)
+            return
+        if old_owner is not None and old_owner != meta.owner_id:
+            self._drop_owner_entry(ch.guild.id, ch.id, old_owner)
+        idx[meta.owner_id] = ch
+        self._schedule(meta)
+
+    # ---------- Expiry heap ----------
+    def _schedule(self, meta: RoomMeta, due: Optional[int] = None) -> None:
+        due = meta.due_ts() if due is None else due
+        if self._next_due.get(meta.channel_id) != due:
+            self._next_due[meta.channel_id] = due
+            heapq.heappush(self._expiry_heap, (due, meta.guild_id, meta.channel_id))
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        self._index_channel(channel)
+
+    def _forget_category(self, ch: discord.abc.GuildChannel) -> None:
+        if self._category_by_guild.get(ch.guild.id) == ch.id:
+            self._category_by_guild.pop(ch.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if isinstance(after, discord.CategoryChannel):
+            if after.name != CATEGORY_NAME:
+                self._forget_category(after)  # renamed away; resolve by name again next time
+            return
+        self._index_channel(after)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # push-based activity tracking; the heap entry is pushed back lazily when it pops
+        meta = self._rooms.get(message.channel.id)
+        if meta is not None:
+            meta.last_activity_ts = snowflake_ts(message.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self._forget_category(channel)
+        self._unindex_channel(channel)
+
+    def _find_owner_room(self, guild: discord.Guild, member_id: int) -> Optional[discord.TextChannel]:
+        return self._room_index(guild).get(member_id)
+
+    def _count_open_rooms(self, guild: discord.Guild) -> int:
+        return len(self._room_index(guild))
 
     # ---------- Core ops ----------
     async def _create_room(self, member: discord.Member) -> Optional[discord.TextChannel]:
@@ -173,12 +298,10 @@ class PrivateRooms(commands.Cog):
         category = await self._ensure_category(guild)
 
         # Capacity guard
-        open_count = await self._count_open_rooms(guild)
-        if open_count >= CAPACITY:
+        if self._count_open_rooms(guild) >= CAPACITY:
             return None
 
-        existing_names = {ch.name for ch in category.channels if isinstance(ch, discord.TextChannel)}
-        ch_name = build_room_name_for(member, existing_names)
+        ch_name = build_room_name_for(member)
 
         expires_at = now_utc() + timedelta(minutes=TTL_MIN)
         topic = make_topic(owner_id=member.id, expires_epoch=int(expires_at.timestamp()))
@@ -192,6 +315,7 @@ class PrivateRooms(commands.Cog):
             topic=topic,
             reason=f"Create on-demand private room for {member} ({member.id})",
         )
+        self._index_channel(channel)
         try:
             await channel.send(
                 f"Hi {member.mention}! This is your on-demand private room.\n"
@@ -203,53 +327,57 @@ class PrivateRooms(commands.Cog):
             pass
         return channel
 
-    async def _delete_room(self, ch: discord.TextChannel, reason: str) -> None:
+    async def _delete_room(self, ch: discord.TextChannel, reason: str) -> bool:
         try:
             await ch.delete(reason=reason)
         except Exception:
-            pass
+            return False
+        self._unindex_channel(ch)
+        return True
 
     # ---------- Auto-prune loop ----------
     @tasks.loop(minutes=5)
     async def _prune_loop(self):
-        now = now_utc()
-        welcome_grace_cutoff = now - timedelta(minutes=WELCOME_GRACE_MIN)
-        inactivity_cutoff = now - timedelta(minutes=INACTIVITY_MIN)
-
+        now_ts = int(now_utc().timestamp())
         for guild in list(self.bot.guilds):
-            category = discord.utils.get(guild.categories, name=CATEGORY_NAME)
-            if not category:
+            self._room_index(guild)  # first sweep for a guild builds its index and schedules its rooms
+
+        # Only rooms whose deadline has passed are popped; the rest of the heap is untouched
+        heap = self._expiry_heap
+        to_delete: List[Tuple[discord.TextChannel, str]] = []
+        while heap and heap[0][0] <= now_ts:
+            due, guild_id, ch_id = heapq.heappop(heap)
+            meta = self._rooms.get(ch_id)
+            if meta is None or self._next_due.get(ch_id) != due:
+                continue  # superseded by a later reschedule (TTL refresh) or already closed
+            del self._next_due[ch_id]
+            guild = self.bot.get_guild(guild_id)
+            ch = guild.get_channel(ch_id) if guild else None
+            if not isinstance(ch, discord.TextChannel):
+                continue
+
+            # Deadline moved (new messages / refreshed topic) → push it back
+            new_due = meta.due_ts()
+            if new_due > now_ts:
+                self._schedule(meta, new_due)
                 continue
-            for ch in list(category.channels):
-                if not isinstance(ch, discord.TextChannel):
-                    continue
-                topic = ch.topic or ""
-                owner_id, expires_epoch = parse_topic(topic)
-                if not owner_id:
-                    continue  # unmanaged
-
-                # Grace: skip very new channels
-                if ch.created_at.replace(tzinfo=timezone.utc) > welcome_grace_cutoff:
-                    continue
-
-                # Hard TTL check
-                if expires_epoch:
-                    expires_at = datetime.fromtimestamp(expires_epoch, tz=timezone.utc)
-                    if now >= expires_at:
-                        await self._delete_room(ch, "TTL expired (on-demand private room)")
-                        await asyncio.sleep(0.2)
-                        continue
-
-                # Inactivity check
-                try:
-                    last_activity = await get_last_activity_at(ch)
-                    if last_activity <= inactivity_cutoff:
-                        await self._delete_room(ch, f"No activity for {INACTIVITY_MIN} minutes (on-demand private room)")
-                        await asyncio.sleep(0.2)
-                except Exception:
-                    # If cannot read history, skip
-                    await asyncio.sleep(0.1)
-                    continue
+
+            if meta.expires_ts and now_ts >= meta.expires_ts:
+                reason = "TTL expired (on-demand private room)"
+            else:
+                reason = f"No activity for {INACTIVITY_MIN} minutes (on-demand private room)"
+            to_delete.append((ch, reason))
+
+        # Delete concurrently; discord.py's route rate limiter paces the actual requests
+        sem = asyncio.Semaphore(PRUNE_CONCURRENCY)
+
+        async def _one(ch: discord.TextChannel, reason: str) -> None:
+            async with sem:
+                meta = self._rooms.get(ch.id)
+                if not await self._delete_room(ch, reason) and meta is not None:
+                    self._schedule(meta, now_ts + SWEEP_INTERVAL_MIN * 60)  # retry next sweep
+
+        await asyncio.gather(*(_one(ch, reason) for ch, reason in to_delete), return_exceptions=True)
 
     @_prune_loop.before_loop
     async def _before_prune(self):
@@ -266,8 +394,8 @@ class PrivateRooms(commands.Cog):
         if not guild or not isinstance(user, discord.Member):
             return await interaction.followup.send("This command must be used in a server.", ephemeral=True)
 
-        # If already exists → refresh TTL & return link
-        existing = await self._find_owner_room(guild, user.id)
+        # If already exists → refresh TTL & return link (plain index lookup, no awaits)
+        existing = self._find_owner_room(guild, user.id)
         if existing:
             # Refresh TTL (extend)
             expires_at = now_utc() + timedelta(minutes=TTL_MIN)
@@ -296,11 +424,12 @@ class PrivateRooms(commands.Cog):
         if not guild or not isinstance(user, discord.Member):
             return await interaction.followup.send("This command must be used in a server.", ephemeral=True)
 
-        ch = await self._find_owner_room(guild, user.id)
+        ch = self._find_owner_room(guild, user.id)
         if not ch:
             return await interaction.followup.send("You don't have an open room. Use `/myroom open`.", ephemeral=True)
 
-        _, exp_epoch = parse_topic(ch.topic or "")
+        meta = self._room_meta(ch)
+        exp_epoch = meta.expires_ts if meta else None
         if exp_epoch:
             exp_at = datetime.fromtimestamp(exp_epoch, tz=timezone.utc)
             return await interaction.followup.send(
@@ -317,7 +446,7 @@ class PrivateRooms(commands.Cog):
         if not guild or not isinstance(user, discord.Member):
             return await interaction.followup.send("This command must be used in a server.", ephemeral=True)
 
-        ch = await self._find_owner_room(guild, user.id)
+        ch = self._find_owner_room(guild, user.id)
         if not ch:
             return await interaction.followup.send("You don't have an open room.", ephemeral=True)
 
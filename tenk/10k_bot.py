@@ -1,13 +1,13 @@
 # bot.py
 # Discord bot that runs your TenKMonitor daily (and on-demand) and posts results.
 
-import io
-import glob
+import time
 import asyncio
 import platform
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import os, sys; sys.path.append(".")
 import os, certifi
 if platform.system() == "Darwin":
@@ -15,7 +15,7 @@ if platform.system() == "Darwin":
     os.environ["SSL_CERT_DIR"] = os.path.dirname(certifi.where())
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 # ---- Your modules ----
 from sec_client import SECClient
@@ -24,20 +24,24 @@ from analyzer import FinancialAnalyzer
 from monitor import TenKMonitor
 from discord_stock.token import discord_tok
 
-intents = discord.Intents.default()
-intents.message_content = True  # <-- REQUIRED for on_message to see "!10k AAPL"
-bot = commands.Bot(command_prefix="!", intents=intents)
-
 # ---------- Config (env-driven) ----------
 DISCORD_TOKEN = f"{discord_tok.dis_1}{discord_tok.dis_2}{discord_tok.dis_3}"
 CHANNEL_ID = int(1424849157348130826) 
 WATCHLIST_FILE = os.getenv("WATCHLIST_FILE", "stocks_watchlist/10k_stocks.txt")
 
+_UTC = timezone.utc  # embed timestamps (aware; datetime.utcnow() is deprecated)
+
 # Daily schedule (Asia/Jerusalem by default)
 TZ = ZoneInfo(os.getenv("LOCAL_TZ", "Asia/Jerusalem"))
 DAILY_HOUR = int(os.getenv("DAILY_HOUR", "23"))     # 09:00 local by default
 DAILY_MIN  = int(os.getenv("DAILY_MIN", "59"))
 
+# Tickers processed at once in the daily run (each one is a to_thread SEC + analyzer job)
+TENK_CONCURRENCY = int(os.getenv("TENK_CONCURRENCY", "4"))
+
+# Keep each <TICKER>_<YYYYMMDD>_analysis.txt report on disk (off by default)
+TENK_ARCHIVE = os.getenv("TENK_ARCHIVE", "")
+
 # Optional: SEC UA (recommended)
 SEC_USER_AGENT = os.getenv("SEC_USER_AGENT", "TenKMonitorBot/1.0 (email@example.com)")
 
@@ -60,21 +64,22 @@ def load_watchlist(path: str) -> List[str]:
             uniq.append(t)
     return uniq
 
-def find_latest_analysis_file(ticker: str) -> Optional[str]:
-    # Match files like: AAPL_20250131_analysis.txt
-    pattern = f"{ticker}_*_analysis.txt"
-    candidates = glob.glob(pattern)
-    if not candidates:
-        return None
-    # Choose the newest by mtime
-    latest = max(candidates, key=os.path.getmtime)
-    return latest
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+# ticker -> running monitor job; overlapping calls (daily run + /run10k) share it
+_inflight: Dict[str, asyncio.Task] = {}
 
 async def run_monitor_once(ticker: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Run your monitor once (blocking) in a thread, then return:
-      (analysis_file_path, filing_date_str, filing_link)
+      (analysis_text or None if no analysis, filing_date_str, filing_link)
+    Concurrent calls for the same ticker await the same job instead of starting another.
     """
+    task = _inflight.get(ticker)
+    if task is not None:
+        return await asyncio.shield(task)
+
     def _blocking():
         # Build fresh clients each run (simple & stateless)
         # If your SECClient needs User-Agent, pass it here:
@@ -87,12 +92,12 @@ async def run_monitor_once(ticker: str) -> Tuple[Optional[str], Optional[str], O
         earnings_client = EarningsClient()
         analyzer = FinancialAnalyzer()
 
-        mon = TenKMonitor(sec_client, earnings_client, analyzer, None)
+        # The report comes back in memory; set TENK_ARCHIVE to also keep the .txt files on disk
+        mon = TenKMonitor(sec_client, earnings_client, analyzer, None, save_report=bool(TENK_ARCHIVE))
         # IMPORTANT: this should be the version that returns immediately (no loop/sleep)
-        mon.start_monitoring(ticker, True)  # (ticker, auto_analyze)
-
-        # After monitor runs, locate the newest analysis file for this ticker
-        latest_file = find_latest_analysis_file(ticker)
+        result = mon.start_monitoring(ticker, True)  # (ticker, auto_analyze)
+        report = result[0] if result else None
+        analysis_text = _clip(report, 3800) if report else None  # keep under Discord 4000 char limit
 
         # Also get latest 10-K meta for message context
         try:
@@ -103,27 +108,26 @@ async def run_monitor_once(ticker: str) -> Tuple[Optional[str], Optional[str], O
             filing_date_str = None
             filing_link = None
 
-        return latest_file, filing_date_str, filing_link
+        return analysis_text, filing_date_str, filing_link
 
-    return await asyncio.to_thread(_blocking)
+    task = _inflight[ticker] = asyncio.create_task(asyncio.to_thread(_blocking))
+    task.add_done_callback(lambda _t: _inflight.pop(ticker, None))
+    return await asyncio.shield(task)
 
-# --- no-threads, auto-delete version ---
+# --- posting (reports stay in memory; no temp files) ---
 async def post_result(channel: discord.abc.Messageable, ticker: str):
-    analysis_file, filing_date, filing_link = await run_monitor_once(ticker)
+    analysis_text, filing_date, filing_link = await run_monitor_once(ticker)
 
-    if not analysis_file:
+    if analysis_text is None:
         await channel.send(f"🔎 `{ticker}` — no analysis found (maybe no fresh 10-K).")
         return
 
-    # Read the analysis text from the file
-    analysis_text = _read_text(analysis_file, limit=3800)  # keep under Discord 4000 char limit
-
     # Build embed
     emb = discord.Embed(
         title=f"{ticker} — Latest 10-K",
         description=analysis_text or "No analysis text available.",
         color=0x2ECC71,  # green accent
-        timestamp=datetime.utcnow(),
+        timestamp=datetime.now(_UTC),
     )
     if filing_date:
         emb.add_field(name="Filed", value=f"`{filing_date}`", inline=True)
@@ -142,13 +146,6 @@ async def post_result(channel: discord.abc.Messageable, ticker: str):
     # Send embed only (no file, no extra summary)
     await channel.send(embed=emb, view=view, silent=True)
 
-    # Delete the temporary file after reading
-    try:
-        if os.path.exists(analysis_file):
-            os.remove(analysis_file)
-    except Exception as e:
-        print(f"[cleanup] could not delete {analysis_file}: {e}")
-
 def _pick_embed_color(ticker: str) -> int:
     # stable-ish color per ticker
     return int.from_bytes(ticker.encode("utf-8")[:3].ljust(3,b"\x00"), "big") % 0xFFFFFF
@@ -174,7 +171,7 @@ def _make_10k_embed(ticker: str, filing_date: Optional[str], filing_link: Option
     title = f"{ticker} — Latest 10-K"
     desc  = _tldr_from_analysis(analysis_text or "No analysis.")
     color = _pick_embed_color(ticker)
-    emb = discord.Embed(title=title, description=desc, color=color, timestamp=datetime.utcnow())
+    emb = discord.Embed(title=title, description=desc, color=color, timestamp=datetime.now(_UTC))
     if filing_date:
         emb.add_field(name="Filed", value=f"`{filing_date}`", inline=True)
     if filing_link:
@@ -188,44 +185,59 @@ class TenKLinkView(discord.ui.View):
         if link_url:
             self.add_item(discord.ui.Button(label="Open 10-K", url=link_url))
 
-# --- helper to read the analysis text (for TL;DR in the embed) ---
-def _read_text(path: str, limit: int = 6000) -> str:
-    try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            txt = f.read()
-        if len(txt) > limit:
-            txt = txt[: limit - 1] + "…"
-        return txt
-    except Exception:
-        return ""
-
 # ---------- Daily Task ----------
-@tasks.loop(minutes=1)
-async def daily_runner():
-    """Check once per minute; when local time hits DAILY_HOUR:DAILY_MIN, run watchlist."""
+def next_daily_run(after: datetime) -> datetime:
+    """First DAILY_HOUR:DAILY_MIN (local TZ) strictly after `after`."""
+    run = after.astimezone(TZ).replace(hour=DAILY_HOUR, minute=DAILY_MIN, second=0, microsecond=0)
+    if run <= after:
+        run += timedelta(days=1)  # same wall-clock time tomorrow, DST-aware
+    return run
+
+async def run_daily_watchlist():
     now = datetime.now(TZ)
-    if now.hour == DAILY_HOUR and now.minute == DAILY_MIN:
-        channel = bot.get_channel(CHANNEL_ID)
-        if channel is None:
-            # If bot just started and cache is cold, fetch
-            channel = await bot.fetch_channel(CHANNEL_ID)
-
-        watchlist = load_watchlist(WATCHLIST_FILE)
-        if not watchlist:
-            await channel.send("ℹ️ Watchlist is empty. Add tickers to `watchlist.txt` (one per line).")
-            return
-
-        await channel.send(
-            f"⏱️ Running daily 10-K check for {len(watchlist)} tickers "
-            f"(local {now.strftime('%Y-%m-%d %H:%M')} {now.tzname()})…"
-        )
-
-        for t in watchlist:
+    channel = bot.get_channel(CHANNEL_ID)
+    if channel is None:
+        # If bot just started and cache is cold, fetch
+        channel = await bot.fetch_channel(CHANNEL_ID)
+
+    watchlist = load_watchlist(WATCHLIST_FILE)
+    if not watchlist:
+        await channel.send("ℹ️ Watchlist is empty. Add tickers to `watchlist.txt` (one per line).")
+        return
+
+    await channel.send(
+        f"⏱️ Running daily 10-K check for {len(watchlist)} tickers "
+        f"(local {now.strftime('%Y-%m-%d %H:%M')} {now.tzname()})…"
+    )
+
+    sem = asyncio.Semaphore(TENK_CONCURRENCY)
+
+    async def one(t: str):
+        async with sem:
             try:
                 await post_result(channel, t)
             except Exception as e:
                 await channel.send(f"⚠️ `{t}` failed: `{e}`")
 
+    await asyncio.gather(*(one(t) for t in watchlist))
+
+async def daily_runner():
+    """Sleep until the next DAILY_HOUR:DAILY_MIN, run the watchlist, repeat (one wake-up per day)."""
+    run = next_daily_run(datetime.now(TZ))
+    while True:
+        # compare epoch seconds: wall-clock subtraction within one tz would ignore DST shifts
+        await asyncio.sleep(max(0.0, run.timestamp() - time.time()))
+        try:
+            await run_daily_watchlist()
+        except Exception as e:
+            print("Daily run failed:", e)
+        # never before `run`, so an early timer wake-up can't fire the same slot twice
+        run = next_daily_run(max(datetime.now(TZ), run))
+
+_daily_task: Optional[asyncio.Task] = None
+# default executor for asyncio.to_thread; room for TENK_CONCURRENCY monitor jobs plus other to_thread callers
+_executor = ThreadPoolExecutor(max_workers=max(8, TENK_CONCURRENCY * 2), thread_name_prefix="tenk")
+
 # ---------- Commands ----------
 @bot.tree.command(name="run10k", description="Run a 10-K analysis now for a specific ticker.")
 async def run10k(interaction: discord.Interaction, ticker: str):
@@ -250,8 +262,13 @@ async def on_ready():
     except Exception as e:
         print("Startup post failed:", e)
 
-    daily_runner.start()
-    print("Daily runner started.")
+    asyncio.get_running_loop().set_default_executor(_executor)
+
+    # on_ready fires again after reconnects; keep a single scheduler task
+    global _daily_task
+    if _daily_task is None or _daily_task.done():
+        _daily_task = asyncio.create_task(daily_runner())
+        print("Daily runner started.")
 
 
 
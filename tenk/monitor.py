@@ -8,11 +8,12 @@ from datetime import datetime
 class TenKMonitor:
     """Monitors for new 10-K filings and analyzes them."""
     
-    def __init__(self, sec_client, earnings_client, analyzer, simulate_date=None):
+    def __init__(self, sec_client, earnings_client, analyzer, simulate_date=None, save_report=True):
         self.sec = sec_client
         self.earnings = earnings_client
         self.analyzer = analyzer
         self.simulate_date = simulate_date
+        self.save_report = save_report  # also write <TICKER>_<YYYYMMDD>_analysis.txt
     
     def get_current_time(self):
         """Get current time (or simulated time)."""
@@ -38,7 +39,7 @@ class TenKMonitor:
                 print(f"URL: {filing['link']}\n")
                 if auto_analyze:
                     if self._within_10_days(filing['filing_date']):
-                        self._analyze_filing(ticker, filing['link'], filing['filing_date'])
+                        return self._analyze_filing(ticker, filing['link'], filing['filing_date'])
                     else:
                         print("Skipping: filing is more than 10 days old.")
             else:
@@ -70,12 +71,17 @@ class TenKMonitor:
                 filing_date.strftime('%Y-%m-%d'),
                 is_latest=True
             )
-            filename = f"{ticker}_{filing_date.strftime('%Y%m%d')}_analysis.txt"
-            with open(filename, "w") as f:
-                f.write(f"10-K Analysis for {ticker}\n")
-                f.write(f"Filing Date: {filing_date.strftime('%Y-%m-%d')}\n")
-                f.write(f"URL: {url}\n\n")
-                f.write(analysis)
-            return analysis, filename, url  # <--- return useful stuff
+            report = (
+                f"10-K Analysis for {ticker}\n"
+                f"Filing Date: {filing_date.strftime('%Y-%m-%d')}\n"
+                f"URL: {url}\n\n"
+                f"{analysis}"
+            )
+            filename = None
+            if self.save_report:
+                filename = f"{ticker}_{filing_date.strftime('%Y%m%d')}_analysis.txt"
+                with open(filename, "w") as f:
+                    f.write(report)
+            return report, filename, url  # <--- return useful stuff
         except Exception as e:
             return None, None, None
@@ -7,7 +7,7 @@ from __future__ import annotations
 import time
 import json
 from datetime import datetime, timedelta, date
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 
 import requests
 
@@ -19,6 +19,11 @@ class SECClient:
     SUBMISSIONS_URL_TMPL = "https://data.sec.gov/submissions/CIK{cik}.json"
     ARCHIVES_IX_TPL = "https://www.sec.gov/ix?doc=/Archives/edgar/data/{cik_no_zeros}/{accession_no_dashes}/{primary_doc}"
 
+    # get_latest_10k results shared by all instances (callers build a fresh client per run);
+    # filings change at most quarterly, so an hour-old answer is fine
+    LATEST_TTL_SECONDS = 3600
+    _latest_cache: Dict[Tuple[str, bool], Tuple[float, dict]] = {}
+
     def __init__(
         self,
         include_amendments: bool = False,
@@ -73,7 +78,18 @@ class SECClient:
               'summary': '<accession_number>'
             }
         or None.
+        Successful lookups are cached for LATEST_TTL_SECONDS.
         """
+        key = ((ticker or "").strip().upper(), self.include_amendments)
+        hit = self._latest_cache.get(key)
+        if hit and time.monotonic() - hit[0] < self.LATEST_TTL_SECONDS:
+            return hit[1]
+        item = self._fetch_latest_10k(ticker)
+        if item is not None:  # misses may be transient request errors; don't pin them
+            self._latest_cache[key] = (time.monotonic(), item)
+        return item
+
+    def _fetch_latest_10k(self, ticker: str) -> Optional[dict]:
         cik = self.get_cik(ticker)
         if not cik:
             return None
@@ -1,12 +1,15 @@
 # tenk_monitor_cog.py
-# Cog: Ten-K monitor (embed-only report, no threads). Auto-deletes temp *_analysis.txt.
+# Cog: Ten-K monitor (embed-only report, no threads). Reports stay in memory; no temp *_analysis.txt.
 from __future__ import annotations
 
 import os
 import io
-import glob
 import asyncio
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Tuple
 import os, sys; sys.path.append(".")
 import os, certifi
@@ -16,7 +19,7 @@ if platform.system() == "Darwin":
     os.environ["SSL_CERT_DIR"] = os.path.dirname(certifi.where())
 
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from zoneinfo import ZoneInfo
 
@@ -27,6 +30,9 @@ from tenk.analyzer import FinancialAnalyzer
 from tenk.monitor import TenKMonitor
 
 
+_UTC = timezone.utc  # embed timestamps (aware; datetime.utcnow() is deprecated)
+
+
 def _env_int(name: str, default: int) -> int:
     v = os.getenv(name)
     if not v:
@@ -37,35 +43,87 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+@dataclass(frozen=True, slots=True)
+class TenKCfg:
+    tz: ZoneInfo
+    daily_hour: int
+    daily_min: int
+    channel_id: int             # where to post; TENK_CHANNEL_ID, fallback CHANNEL_ID
+    sec_user_agent: str
+    watchlist_file: str
+    state_file: str             # local date of the last daily run; kept out of the source tree
+    concurrency: int            # tickers in flight during the daily run
+    per_ticker_timeout: int     # seconds, daily run, counted from when a pool thread starts the ticker
+    run_timeout: int            # seconds for the whole daily run; tickers not done by then count as timed out
+    thread_pool: int
+
+    @classmethod
+    def from_env(cls) -> "TenKCfg":
+        return cls(
+            tz=ZoneInfo(os.getenv("LOCAL_TZ", "Asia/Jerusalem")),
+            daily_hour=_env_int("DAILY_HOUR", 23),
+            daily_min=_env_int("DAILY_MIN", 59),
+            channel_id=_env_int("TENK_CHANNEL_ID", _env_int("CHANNEL_ID", 0)),
+            sec_user_agent=os.getenv("SEC_USER_AGENT", "TenKMonitorBot/1.0 (email@example.com)"),
+            watchlist_file=os.getenv("TENK_WATCHLIST_FILE", os.getenv("WATCHLIST_FILE", "stocks_watchlist/10k_stocks.txt")),
+            state_file=os.getenv("TENK_STATE_FILE", os.path.join(
+                os.getenv("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "tenk", "tenk_last.txt")),
+            concurrency=_env_int("TENK_CONCURRENCY", 4),
+            per_ticker_timeout=_env_int("TENK_PER_TICKER_TIMEOUT", 120),
+            run_timeout=_env_int("TENK_RUN_TIMEOUT", 3600),
+            thread_pool=_env_int("TENK_THREAD_POOL", 8),
+        )
+
+
 def _load_watchlist(path: str) -> List[str]:
     if not os.path.exists(path):
         return []
     with open(path, "r", encoding="utf-8") as f:
-        tickers = [ln.strip().upper() for ln in f if ln.strip()]
-    seen, uniq = set(), []
-    for t in tickers:
-        if t not in seen:
-            seen.add(t); uniq.append(t)
-    return uniq
+        # dict.fromkeys: de-dup, keep order
+        return list(dict.fromkeys(t for t in (ln.strip().upper() for ln in f) if t))
 
 
-def _read_text(path: str, limit: int = 3800) -> str:
-    try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            txt = f.read()
-        if len(txt) > limit:
-            txt = txt[:limit-1] + "…"
-        return txt
-    except Exception:
-        return ""
+def _clip(text: str, limit: int = 3800) -> str:
+    return text if len(text) <= limit else text[:limit-1] + "…"
+
+
+_EMBED_COLOR = 0x2ECC71  # green accent
+_EMBED_FOOTER = "10-K Monitor • auto-generated"
+
+
+def _make_embed(ticker: str, text: str, filed: Optional[str], link: Optional[str], ts: datetime) -> discord.Embed:
+    emb = discord.Embed(
+        title=f"{ticker} — Latest 10-K",
+        description=text or "No analysis text available.",
+        color=_EMBED_COLOR,
+        timestamp=ts,
+    )
+    if filed:
+        emb.add_field(name="Filed", value=f"`{filed}`", inline=True)
+    if link:
+        emb.add_field(name="Document", value=f"[Open 10-K]({link})", inline=True)
+    return emb.set_footer(text=_EMBED_FOOTER)
 
 
-def _find_latest_analysis_file(ticker: str) -> Optional[str]:
-    pattern = f"{ticker}_*_analysis.txt"
-    candidates = glob.glob(pattern)
-    if not candidates:
-        return None
-    return max(candidates, key=os.path.getmtime)
+class TenKLinkView(discord.ui.View):
+    def __init__(self, link_url: Optional[str]):
+        super().__init__(timeout=None)
+        if link_url:
+            self.add_item(discord.ui.Button(label="Open 10-K", url=link_url))
+
+
+def _embed_batches(reports, max_embeds: int = 10, max_chars: int = 6000):
+    """Split (ticker, embed, link) reports into messages within Discord's 10-embed / 6000-char limits."""
+    batch, size = [], 0
+    for item in reports:
+        n = len(item[1])
+        if batch and (len(batch) == max_embeds or size + n > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(item)
+        size += n
+    if batch:
+        yield batch
 
 
 class TenKMonitorCog(commands.Cog):
@@ -74,49 +132,83 @@ class TenKMonitorCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-        # config
-        self.TZ = ZoneInfo(os.getenv("LOCAL_TZ", "Asia/Jerusalem"))
-        self.DAILY_HOUR = _env_int("DAILY_HOUR", 23)
-        self.DAILY_MIN  = _env_int("DAILY_MIN", 59)
+        # config, read from the environment once
+        self.cfg = TenKCfg.from_env()
 
-        # where to post; prefer TENK_CHANNEL_ID, fallback CHANNEL_ID
-        self.CHANNEL_ID = _env_int("TENK_CHANNEL_ID", _env_int("CHANNEL_ID", 0))
+        self._daily_task: Optional[asyncio.Task] = None
+        # local date of the last daily run, kept on disk so a restart/reload can't run it twice
+        self._last_daily_key: Optional[str] = None
+        self._wl_cache: Optional[Tuple[float, List[str]]] = None  # (mtime, tickers) of cfg.watchlist_file
 
-        self.SEC_USER_AGENT = os.getenv("SEC_USER_AGENT", "TenKMonitorBot/1.0 (email@example.com)")
-        self.WATCHLIST_FILE = os.getenv("TENK_WATCHLIST_FILE", os.getenv("WATCHLIST_FILE", "stocks_watchlist/10k_stocks.txt"))
+        # caps how many tickers (SEC fetch + analyzer + Discord post) run at once
+        self._sem = asyncio.Semaphore(self.cfg.concurrency)
 
-        self._last_daily_key: Optional[str] = None
+        # SEC / earnings / analyzer clients shared by every run (keeps their HTTP pools warm);
+        # built on first use, from a worker thread
+        self._clients: Optional[Tuple[SECClient, EarningsClient, FinancialAnalyzer]] = None
+        self._clients_lock = threading.Lock()
+
+        # dedicated pool for the blocking monitor runs, sized apart from the loop's default executor
+        self._pool = ThreadPoolExecutor(max_workers=self.cfg.thread_pool, thread_name_prefix="tenk")
 
         # note: DO NOT start loops in __init__; use cog_load()
 
     async def cog_load(self):
         """Called after the cog is added and the bot is ready to set up tasks."""
-        # start the minute ticker
-        self.daily_runner.start()
+        # one sleeping task that wakes at DAILY_HOUR:DAILY_MIN
+        try:
+            with open(self.cfg.state_file, "r", encoding="utf-8") as f:
+                self._last_daily_key = f.read().strip() or None
+        except OSError:
+            pass
+        self._daily_task = asyncio.create_task(self._daily_scheduler())
         print("[tenk] Cog loaded, daily_runner started.")
 
     async def cog_unload(self):
         """Called when the cog is being removed; stop loops."""
-        self.daily_runner.cancel()
+        if self._daily_task is not None:
+            self._daily_task.cancel()
+        self._pool.shutdown(wait=False)
         print("[tenk] Cog unloaded, daily_runner stopped.")
 
+    def _watchlist(self) -> List[str]:
+        """cfg.watchlist_file tickers; only re-parsed when the file's mtime changes."""
+        try:
+            mtime = os.stat(self.cfg.watchlist_file).st_mtime
+        except OSError:
+            self._wl_cache = None
+            return []
+        if self._wl_cache is None or self._wl_cache[0] != mtime:
+            self._wl_cache = (mtime, _load_watchlist(self.cfg.watchlist_file))
+        return self._wl_cache[1]
+
     # ----------- core run/post -----------
-    async def _run_monitor_once(self, ticker: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-        """(analysis_file_path, filing_date_str, filing_link)"""
-        def _blocking():
-            try:
-                sec_client = SECClient(self.SEC_USER_AGENT)
-            except TypeError:
-                sec_client = SECClient()
+    def _get_clients(self) -> Tuple[SECClient, EarningsClient, FinancialAnalyzer]:
+        # the clients hold no per-ticker state, so concurrent runs can share them
+        with self._clients_lock:
+            if self._clients is None:
+                try:
+                    sec_client = SECClient(self.cfg.sec_user_agent)
+                except TypeError:
+                    sec_client = SECClient()
+                self._clients = (sec_client, EarningsClient(), FinancialAnalyzer())
+            return self._clients
+
+    async def _run_monitor_once(self, ticker: str, started: Optional[asyncio.Event] = None) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """(analysis_text or None if no fresh analysis, filing_date_str, filing_link); `started` is set once a pool thread picks the job up."""
+        loop = asyncio.get_running_loop()
 
-            earnings_client = EarningsClient()
-            analyzer = FinancialAnalyzer()
-            mon = TenKMonitor(sec_client, earnings_client, analyzer, None)
+        def _blocking():
+            if started is not None:
+                loop.call_soon_threadsafe(started.set)
+            sec_client, earnings_client, analyzer = self._get_clients()
+            # save_report=False: the report comes back in memory, nothing to read back or delete
+            mon = TenKMonitor(sec_client, earnings_client, analyzer, None, save_report=False)
 
             # single-check version:
-            mon.start_monitoring(ticker, True)
-
-            latest_file = _find_latest_analysis_file(ticker)
+            result = mon.start_monitoring(ticker, True)
+            report = result[0] if result else None
+            analysis_text = _clip(report) if report else None  # under Discord's 4000 char limit
 
             filing_date_str, filing_link = None, None
             try:
@@ -128,74 +220,115 @@ class TenKMonitorCog(commands.Cog):
             except Exception:
                 pass
 
-            return latest_file, filing_date_str, filing_link
+            return analysis_text, filing_date_str, filing_link
+
+        return await loop.run_in_executor(self._pool, _blocking)
+
+    async def _build_report(self, ticker: str, ts: Optional[datetime] = None, started: Optional[asyncio.Event] = None) -> Tuple[Optional[discord.Embed], Optional[str]]:
+        """
+        Run the monitor for one ticker -> (embed, filing_link); (None, None) if there is no analysis.
+        `ts` is the embed timestamp (a daily run passes one for all its tickers); defaults to now.
+        """
+        analysis_text, filing_date, filing_link = await self._run_monitor_once(ticker, started)
+
+        if analysis_text is None:
+            return None, None
 
-        return await asyncio.to_thread(_blocking)
+        return _make_embed(ticker, analysis_text, filing_date, filing_link, ts or datetime.now(_UTC)), filing_link
 
     async def _post_embed_only(self, channel: discord.abc.Messageable, ticker: str):
-        analysis_file, filing_date, filing_link = await self._run_monitor_once(ticker)
+        emb, filing_link = await self._build_report(ticker)
 
-        if not analysis_file:
+        if emb is None:
             await channel.send(f"🔎 `{ticker}` — no analysis found (maybe no fresh 10-K).")
             return
 
-        analysis_text = _read_text(analysis_file, limit=3800)
+        view = TenKLinkView(filing_link) if filing_link else None  # no empty components payload
 
-        emb = discord.Embed(
-            title=f"{ticker} — Latest 10-K",
-            description=analysis_text or "No analysis text available.",
-            color=0x2ECC71,
-            timestamp=datetime.utcnow(),
-        )
-        if filing_date:
-            emb.add_field(name="Filed", value=f"`{filing_date}`", inline=True)
-        if filing_link:
-            emb.add_field(name="Document", value=f"[Open 10-K]({filing_link})", inline=True)
-        emb.set_footer(text="10-K Monitor • auto-generated")
+        await channel.send(embed=emb, view=view, silent=True)
 
-        class TenKLinkView(discord.ui.View):
-            def __init__(self, link_url: Optional[str]):
-                super().__init__(timeout=None)
-                if link_url:
-                    self.add_item(discord.ui.Button(label="Open 10-K", url=link_url))
+    async def _build_guarded(self, ticker: str, ts: datetime) -> Tuple[Optional[discord.Embed], Optional[str]]:
+        # a stuck SEC/analyzer call can't hold up the whole run: the ticker is reported as timed
+        # out, but its slot stays taken until the worker thread returns, since the thread does too
+        await self._sem.acquire()
+        started = asyncio.Event()
+        task = asyncio.create_task(self._build_report(ticker, ts, started))
+        task.add_done_callback(self._release_slot)
 
-        view = TenKLinkView(filing_link)
+        # the clock starts once a pool thread picks the job up, not while it waits for one
+        waiter = asyncio.create_task(started.wait())
+        try:
+            await asyncio.wait((task, waiter), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()  # run deadline hit while still queued for a pool thread; drop the job
+            raise
+        finally:
+            waiter.cancel()
+        done, _ = await asyncio.wait((task,), timeout=self.cfg.per_ticker_timeout)
+        if not done:
+            raise asyncio.TimeoutError
+        return task.result()
+
+    def _release_slot(self, task: asyncio.Task) -> None:
+        self._sem.release()
+        if not task.cancelled():
+            task.exception()  # a late failure after a timeout was already reported; don't log it again
 
-        await channel.send(embed=emb, view=view, silent=True)
+    # ----------- scheduler -----------
+    def _next_daily_run(self, after: datetime) -> datetime:
+        """First daily_hour:daily_min (cfg.tz) strictly after `after`."""
+        run = after.astimezone(self.cfg.tz).replace(hour=self.cfg.daily_hour, minute=self.cfg.daily_min, second=0, microsecond=0)
+        if run <= after:
+            run += timedelta(days=1)  # same wall-clock time tomorrow, DST-aware
+        return run
+
+    async def _daily_scheduler(self):
+        await self.bot.wait_until_ready()
+        run = self._next_daily_run(datetime.now(self.cfg.tz))
+        while True:
+            # epoch seconds, not wall-clock subtraction, so DST shifts don't move the run
+            await asyncio.sleep(max(0.0, run.timestamp() - time.time()))
+            try:
+                await self.daily_runner()
+            except Exception as e:
+                print(f"[tenk] daily run failed: {e!r}")
+            # never before `run`, so an early timer wake-up can't fire the same slot twice
+            run = self._next_daily_run(max(datetime.now(self.cfg.tz), run))
 
-        # cleanup local file
+    def _save_daily_key(self, key: str) -> None:
         try:
-            if os.path.exists(analysis_file):
-                os.remove(analysis_file)
-        except Exception as e:
-            print(f"[tenk] cleanup failed: {e!r}")
+            os.makedirs(os.path.dirname(self.cfg.state_file) or ".", exist_ok=True)
+            with open(self.cfg.state_file, "w", encoding="utf-8") as f:
+                f.write(key)
+        except OSError as e:
+            print(f"[tenk] cannot save {self.cfg.state_file}: {e!r}")
+
+    async def _mark_daily_done(self, key: str) -> None:
+        self._last_daily_key = key
+        await asyncio.to_thread(self._save_daily_key, key)
 
-    # ----------- scheduler -----------
-    @tasks.loop(minutes=1)
     async def daily_runner(self):
-        if not self.CHANNEL_ID:
-            return
-        now = datetime.now(self.TZ)
-        if now.hour != self.DAILY_HOUR or now.minute != self.DAILY_MIN:
+        if not self.cfg.channel_id:
             return
+        now = datetime.now(self.cfg.tz)
 
-        # once per minute key
-        key = now.strftime("%Y-%m-%d %H:%M")
+        # at most once per local day
+        key = now.strftime("%Y-%m-%d")
         if self._last_daily_key == key:
             return
-        self._last_daily_key = key
 
-        channel = self.bot.get_channel(self.CHANNEL_ID)
+        channel = self.bot.get_channel(self.cfg.channel_id)
         if channel is None:
             try:
-                channel = await self.bot.fetch_channel(self.CHANNEL_ID)
+                channel = await self.bot.fetch_channel(self.cfg.channel_id)
             except Exception as e:
-                print(f"[tenk] cannot fetch channel {self.CHANNEL_ID}: {e!r}")
+                print(f"[tenk] cannot fetch channel {self.cfg.channel_id}: {e!r}")
                 return
 
-        watchlist = _load_watchlist(self.WATCHLIST_FILE)
+        watchlist = self._watchlist()
         if not watchlist:
             await channel.send("ℹ️ 10-K watchlist is empty. Add tickers to the configured file.")
+            await self._mark_daily_done(key)
             return
 
         await channel.send(
@@ -203,15 +336,55 @@ class TenKMonitorCog(commands.Cog):
             f"(local {now.strftime('%Y-%m-%d %H:%M')} {now.tzname()})…"
         )
 
-        for t in watchlist:
+        # hung tickers hold their slots, so the run as a whole has a deadline too; whatever is
+        # still queued or running then is reported as timed out and the day is closed out
+        jobs = [asyncio.create_task(self._build_guarded(t, now)) for t in watchlist]
+        _, unfinished = await asyncio.wait(jobs, timeout=self.cfg.run_timeout)
+        for job in unfinished:
+            job.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+        reports, missing = [], []
+        for t, job in zip(watchlist, jobs):
+            if job in unfinished:
+                await channel.send(f"⏱️ `{t}` not finished when the run hit its {self.cfg.run_timeout}s limit")
+                continue
+            res = job.exception() or job.result()
+            if isinstance(res, asyncio.TimeoutError):
+                await channel.send(f"⏱️ `{t}` timed out after {self.cfg.per_ticker_timeout}s")
+            elif isinstance(res, Exception):
+                await channel.send(f"⚠️ `{t}` failed: `{res}`")
+            elif res[0] is None:
+                missing.append(t)
+            else:
+                reports.append((t, res[0], res[1]))
+
+        # one message per batch of embeds instead of one per ticker
+        for batch in _embed_batches(reports):
+            view = None
+            links = [(t, link) for t, _, link in batch if link]
+            if links:
+                view = discord.ui.View(timeout=None)
+                for t, link in links:
+                    view.add_item(discord.ui.Button(label=f"{t} 10-K", url=link))
             try:
-                await self._post_embed_only(channel, t)
+                await channel.send(embeds=[emb for _, emb, _ in batch], view=view, silent=True)
             except Exception as e:
-                await channel.send(f"⚠️ `{t}` failed: `{e}`")
-
-    @daily_runner.before_loop
-    async def _before_daily(self):
-        await self.bot.wait_until_ready()
+                print(f"[tenk] batch post failed ({', '.join(t for t, _, _ in batch)}): {e!r}")
+                # one bad embed shouldn't hide the whole batch: post them one by one
+                for t, emb, link in batch:
+                    try:
+                        await channel.send(embed=emb, view=TenKLinkView(link) if link else None, silent=True)
+                    except Exception as e:
+                        await channel.send(f"⚠️ `{t}` failed: `{e}`")
+
+        if missing:
+            await channel.send(
+                "🔎 No analysis found (maybe no fresh 10-K): " + ", ".join(f"`{t}`" for t in missing)
+            )
+
+        # only a finished run counts; a crash or restart mid-run retries it on the next slot
+        await self._mark_daily_done(key)
 
     # ----------- commands -----------
     @app_commands.command(name="run10k", description="Run a 10-K analysis now for a specific ticker.")